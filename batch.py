@@ -0,0 +1,40 @@
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .cpmodel import LazyCPModel, QUIET
+
+def find_model_files(path, pattern = '*.model') -> list:
+    #"""The model files matching [pattern] inside the directory [path], or matching [path] itself if it is a glob.
+    #Patterns may use ** to search subdirectories."""
+    if os.path.isdir(path):
+        path = os.path.join(path, pattern)
+    return sorted(glob.glob(path, recursive=True))
+
+def parse_file(filepath, verbosity = QUIET, cache = None) -> dict:
+    #"""Fully decode one model in a worker process, through [cache] if one is given.
+    #Texture payloads are views into the worker's file mapping, so they are turned into arrays that pickle back to the caller."""
+    if cache:
+        model = cache.load(filepath, verbosity)
+    else:
+        model = LazyCPModel(filepath, verbosity).load()
+    for texture in model['textures']:
+        texture['data'] = np.frombuffer(texture['data'], np.uint8)
+    return model
+
+def parse_files(filepaths, workers = None, verbosity = QUIET, cache = None):
+    #"""Parse [filepaths] in parallel on [workers] processes, all cores if None.
+    #Yields (filepath, model, error) as each file finishes. A file that fails yields its error
+    #with a None model instead of aborting the rest of the batch."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(parse_file, filepath, verbosity, cache): filepath for filepath in filepaths}
+        for future in as_completed(futures):
+            filepath = futures[future]
+            try:
+                model = future.result()
+            except Exception as error:
+                yield filepath, None, error
+                continue
+            yield filepath, model, None
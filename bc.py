@@ -0,0 +1,107 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from .dds import texture_size
+
+def fourcc(code) -> int:
+    return int.from_bytes(code, 'little')
+
+#FourCC: (bytes per 4x4 block, alpha encoding)
+BC_FORMATS = {
+    fourcc(b'DXT1'): (8, None),             #BC1, 1 bit alpha in the color block
+    fourcc(b'DXT2'): (16, 'explicit'),      #BC2, premultiplied
+    fourcc(b'DXT3'): (16, 'explicit'),      #BC2
+    fourcc(b'DXT4'): (16, 'interpolated'),  #BC3, premultiplied
+    fourcc(b'DXT5'): (16, 'interpolated'),  #BC3
+}
+
+def can_decode(texture) -> bool:
+    return texture['dxt'] in BC_FORMATS
+
+def decode_color_blocks(blocks, punchthrough) -> np.ndarray:
+    #"""Decode (N, 8) BC1 color blocks into (N, 16, 4) RGBA texels.
+    #With [punchthrough] blocks whose first color isn't greater than the second use 3 colors and transparent black."""
+    endpoints = blocks[:, 0:4].copy().view('<u2').astype(np.int32)
+    
+    #(N, 2, 3) rgb of both 565 endpoints
+    rgb = np.stack(((endpoints >> 11) & 31, (endpoints >> 5) & 63, endpoints & 31), axis=-1).astype(np.float32)
+    rgb /= np.array([31, 63, 31], np.float32)
+    c0 = rgb[:, 0]
+    c1 = rgb[:, 1]
+    
+    palette = np.ones((len(blocks), 4, 4), np.float32)
+    palette[:, 0, :3] = c0
+    palette[:, 1, :3] = c1
+    palette[:, 2, :3] = (2 * c0 + c1) / 3
+    palette[:, 3, :3] = (c0 + 2 * c1) / 3
+    
+    if punchthrough:
+        three_color = endpoints[:, 0] <= endpoints[:, 1]
+        palette[three_color, 2, :3] = (c0[three_color] + c1[three_color]) / 2
+        palette[three_color, 3] = 0
+    
+    bits = blocks[:, 4:8].copy().view('<u4')
+    indices = (bits >> (2 * np.arange(16, dtype=np.uint32))) & 3
+    return np.take_along_axis(palette, indices[:, :, None].astype(np.intp), axis=1)
+
+def decode_explicit_alpha(blocks) -> np.ndarray:
+    #"""Decode (N, 8) BC2 alpha blocks of 4 bits per texel into (N, 16) alpha"""
+    bits = blocks.copy().view('<u8')
+    return ((bits >> (4 * np.arange(16, dtype=np.uint64))) & 15).astype(np.float32) / 15
+
+def decode_interpolated_alpha(blocks) -> np.ndarray:
+    #"""Decode (N, 8) BC3 alpha blocks of two endpoints and 3 bit indices into (N, 16) alpha"""
+    a0 = blocks[:, 0].astype(np.float32)[:, None]
+    a1 = blocks[:, 1].astype(np.float32)[:, None]
+    
+    #8 alpha mode for a0 > a1, otherwise 6 alphas plus 0 and 255
+    steps = np.arange(1, 7, dtype=np.float32)
+    eight = np.concatenate((a0, a1, ((7 - steps) * a0 + steps * a1) / 7), axis=1)
+    six = np.concatenate((a0, a1, ((5 - steps[:4]) * a0 + steps[:4] * a1) / 5, np.zeros_like(a0), np.full_like(a0, 255)), axis=1)
+    palette = np.where(a0 > a1, eight, six) / 255
+    
+    index_bytes = np.zeros((len(blocks), 8), np.uint8)
+    index_bytes[:, :6] = blocks[:, 2:8]
+    bits = index_bytes.view('<u8')
+    indices = (bits >> (3 * np.arange(16, dtype=np.uint64))) & 7
+    return np.take_along_axis(palette, indices.astype(np.intp), axis=1)
+
+def decode_texture(texture) -> np.ndarray:
+    #"""Decode the top mip of a BC1/BC2/BC3 [texture] into a (height, width, 4) float RGBA array.
+    #Rows run bottom to top, the way Blender stores image pixels."""
+    block_size, alpha = BC_FORMATS[texture['dxt']]
+    width, height = texture_size(texture)
+    blocks_x = max(1, (width + 3) // 4)
+    blocks_y = max(1, (height + 3) // 4)
+    
+    data = np.frombuffer(texture['data'], np.uint8)
+    if len(data) < blocks_x * blocks_y * block_size:
+        raise ValueError("Texture {0} is too short for a {1}x{2} image".format(texture['name'], width, height))
+    blocks = data[:blocks_x * blocks_y * block_size].reshape(-1, block_size)
+    
+    if alpha == None:
+        texels = decode_color_blocks(blocks, True)
+    else:
+        texels = decode_color_blocks(blocks[:, 8:], False)
+        if alpha == 'explicit':
+            texels[:, :, 3] = decode_explicit_alpha(blocks[:, :8])
+        else:
+            texels[:, :, 3] = decode_interpolated_alpha(blocks[:, :8])
+    
+    #(block row, block column, texel row, texel column, rgba) to (row, column, rgba)
+    pixels = texels.reshape(blocks_y, blocks_x, 4, 4, 4).transpose(0, 2, 1, 3, 4).reshape(blocks_y * 4, blocks_x * 4, 4)
+    return np.ascontiguousarray(pixels[:height, :width][::-1])
+
+def decode_textures(textures, workers = None) -> list:
+    #"""Decode every texture on a pool of [workers] threads, None for textures in formats that can't be decoded
+    #or whose data is malformed, so they go the .dds way instead of failing the whole import"""
+    def decode(texture):
+        if not can_decode(texture):
+            return None
+        try:
+            return decode_texture(texture)
+        except ValueError:
+            return None
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(decode, textures))
@@ -0,0 +1,38 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+#Parser benchmarks on synthetic models, run with: python -m pytest benchmarks (needs pytest-benchmark)
+
+#The add-on is a package named after its directory, import it the way Blender would
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ROOT))
+addon = importlib.import_module(os.path.basename(ROOT))
+synthetic = importlib.import_module(addon.__name__ + '.synthetic')
+
+#Model sizes the benchmarks are repeated at, as generate_model options
+SIZES = {
+    'small': dict(elements=4, vertex_streams=1, vertices=1024, face_streams=2, meshes=4, triangles=512, textures=1, texture_size=64),
+    'medium': dict(elements=32, vertex_streams=2, vertices=16384, face_streams=2, meshes=16, triangles=4096, textures=4, texture_size=256),
+    'large': dict(elements=256, vertex_streams=4, vertices=65536, face_streams=4, meshes=64, triangles=16384, textures=8, texture_size=1024),
+}
+
+@pytest.fixture(scope='session', params=list(SIZES))
+def model_file(request, tmp_path_factory):
+    #"""(path, generated model) of a synthetic model of every size"""
+    filepath = str(tmp_path_factory.mktemp('models') / '{0}.model'.format(request.param))
+    model = synthetic.write_synthetic_model(filepath, **SIZES[request.param])
+    return filepath, model
+
+def throughput(benchmark, megabytes = None, vertices = None):
+    #"""Record MB/s and vertices/s of the mean round in the benchmark's extra info"""
+    #Nothing was measured with --benchmark-disable
+    if benchmark.stats == None:
+        return
+    mean = benchmark.stats.stats.mean
+    if not megabytes == None:
+        benchmark.extra_info['MB/s'] = megabytes / mean
+    if not vertices == None:
+        benchmark.extra_info['vertices/s'] = vertices / mean
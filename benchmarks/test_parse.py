@@ -0,0 +1,71 @@
+import os
+import importlib
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from conftest import addon, throughput
+
+cpmodel = importlib.import_module(addon.__name__ + '.cpmodel')
+writer = importlib.import_module(addon.__name__ + '.writer')
+
+#Each benchmark times one section of the parse on every model size. The structure parse is done
+#in the untimed setup of the section benchmarks, so they only measure decoding their payloads.
+
+def megabytes(filepath) -> float:
+    return os.path.getsize(filepath) / (1024 * 1024)
+
+def vertex_count(model) -> int:
+    return sum(len(stream['attributes'][0]) for stream in model['vertex_streams'])
+
+def test_structure(benchmark, model_file):
+    filepath, model = model_file
+    parsed = benchmark(cpmodel.LazyCPModel, filepath)
+    assert len(parsed['elements']) == len(model['elements'])
+    throughput(benchmark, megabytes(filepath))
+
+def test_vertex_streams(benchmark, model_file):
+    filepath, model = model_file
+    
+    def decode(parsed):
+        return [parsed.vertex_stream(i) for i in range(len(parsed['vertex_streams']))]
+    streams = benchmark.pedantic(decode, setup=lambda: ((cpmodel.LazyCPModel(filepath),), {}), rounds=20)
+    
+    assert len(streams) == len(model['vertex_streams'])
+    size = sum(stream['attributes'][0].shape[0] * cpmodel.vertex_stream_dtype(stream['definition']).itemsize for stream in model['vertex_streams'])
+    throughput(benchmark, size / (1024 * 1024), vertex_count(model))
+
+def test_face_streams(benchmark, model_file):
+    filepath, model = model_file
+    
+    def triangulate(parsed):
+        return [cpmodel.triangulate_faces(parsed.face_stream(mesh['face_stream_index']), mesh['face_type'], mesh['data1'][0]['face_offset'],
+                                          mesh['data1'][0]['face_count'], mesh['data1'][0]['vert_offset']) for mesh in parsed['meshes']]
+    triangles = benchmark.pedantic(triangulate, setup=lambda: ((cpmodel.LazyCPModel(filepath),), {}), rounds=20)
+    
+    assert len(triangles) == len(model['meshes'])
+    throughput(benchmark, sum(stream['faces'].nbytes for stream in model['face_streams']) / (1024 * 1024))
+
+def test_textures(benchmark, model_file):
+    filepath, model = model_file
+    
+    def read(parsed):
+        return [bytes(parsed.texture_data(i)) for i in range(len(parsed['textures']))]
+    textures = benchmark.pedantic(read, setup=lambda: ((cpmodel.LazyCPModel(filepath),), {}), rounds=20)
+    
+    assert [len(texture) for texture in textures] == [texture['data'].nbytes for texture in model['textures']]
+    throughput(benchmark, sum(len(texture) for texture in textures) / (1024 * 1024))
+
+def test_load(benchmark, model_file):
+    filepath, model = model_file
+    loaded = benchmark(cpmodel.read_cpmodel_data, None, filepath)
+    assert vertex_count(loaded) == vertex_count(model)
+    throughput(benchmark, megabytes(filepath), vertex_count(model))
+
+def test_write(benchmark, model_file, tmp_path):
+    filepath, model = model_file
+    output = str(tmp_path / 'written.model')
+    benchmark(writer.write_cpmodel, output, model)
+    assert os.path.getsize(output) == os.path.getsize(filepath)
+    throughput(benchmark, megabytes(output), vertex_count(model))
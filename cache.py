@@ -0,0 +1,165 @@
+import os
+import io
+import json
+import mmap
+import hashlib
+import tempfile
+import zipfile
+
+import numpy as np
+
+from .cpmodel import LazyCPModel, RecordTable, QUIET, PARSER_VERSION
+from .profiler import Profiler
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), 'BlurImportExport')
+DEFAULT_CACHE_SIZE = 2 * 1024 * 1024 * 1024
+
+def content_hash(filepath) -> str:
+    with open(filepath, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return hashlib.blake2b(digest_size=16).hexdigest()
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def cache_key(filepath) -> str:
+    #"""Key of a model file from its size, modification time, content and the parser version"""
+    stat = os.stat(filepath)
+    key = '{0}:{1}:{2}:{3}'.format(PARSER_VERSION, stat.st_size, stat.st_mtime_ns, content_hash(filepath))
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+#A decoded model is stored as one uncompressed .npz: every array (and texture payload) is a member,
+#the remaining nested dicts and lists are a JSON tree under '__model__' that refers to the members by name.
+
+def pack_model(value, arrays):
+    if isinstance(value, RecordTable):
+        return {'__table__':[pack_model(value.array, arrays), value.names, pack_model(value.lists, arrays)]}
+    if isinstance(value, memoryview):
+        value = np.frombuffer(value, np.uint8)
+    if isinstance(value, np.ndarray):
+        name = 'a{0}'.format(len(arrays))
+        arrays[name] = value
+        return {'__array__':name}
+    if isinstance(value, dict):
+        return {key:pack_model(item, arrays) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return {'__tuple__':[pack_model(item, arrays) for item in value]}
+    if isinstance(value, list):
+        return [pack_model(item, arrays) for item in value]
+    return value
+
+def unpack_model(value, arrays):
+    if isinstance(value, dict):
+        if '__array__' in value:
+            return arrays[value['__array__']]
+        if '__tuple__' in value:
+            return tuple(unpack_model(item, arrays) for item in value['__tuple__'])
+        if '__table__' in value:
+            array, names, lists = value['__table__']
+            return RecordTable(unpack_model(array, arrays), names, unpack_model(lists, arrays))
+        return {key:unpack_model(item, arrays) for key, item in value.items()}
+    if isinstance(value, list):
+        return [unpack_model(item, arrays) for item in value]
+    return value
+
+def write_archive(filepath, model):
+    arrays = {}
+    tree = pack_model(model, arrays)
+    arrays['__model__'] = np.frombuffer(json.dumps(tree).encode('utf-8'), np.uint8)
+    
+    #Written next to the destination and moved over it so readers never see a partial archive
+    temp = filepath + '.{0}.tmp'.format(os.getpid())
+    with open(temp, 'wb') as file:
+        np.savez(file, **arrays)
+    os.replace(temp, filepath)
+
+def read_archive(filepath) -> dict:
+    #"""Load an archive written by write_archive with every array as a read-only view into a memory map of the file"""
+    with open(filepath, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    arrays = {}
+    with zipfile.ZipFile(filepath) as archive:
+        for info in archive.infolist():
+            #np.savez stores members uncompressed, so each .npy sits in the file as is after its local header
+            name_length = int.from_bytes(data[info.header_offset + 26:info.header_offset + 28], 'little')
+            extra_length = int.from_bytes(data[info.header_offset + 28:info.header_offset + 30], 'little')
+            start = info.header_offset + 30 + name_length + extra_length
+            
+            header = io.BytesIO(data[start:start + 0x10000])
+            version = np.lib.format.read_magic(header)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(header)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(header)
+            
+            count = int(np.prod(shape))
+            array = np.frombuffer(data, dtype, count, start + header.tell())
+            arrays[info.filename[:-len('.npy')]] = array.reshape(shape, order='F' if fortran_order else 'C')
+    
+    tree = json.loads(str(arrays.pop('__model__'), 'utf-8'))
+    return unpack_model(tree, arrays)
+
+class ParseCache:
+    #"""Decoded models stored in [directory] and keyed by the content of their source file.
+    #The least recently used entries are removed once the directory grows past [max_size] bytes."""
+    def __init__(self, directory = DEFAULT_CACHE_DIRECTORY, max_size = DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+    
+    def entries(self) -> list:
+        if not os.path.isdir(self.directory):
+            return []
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith('.npz')]
+    
+    def load(self, filepath, verbosity = QUIET, profiler = None) -> dict:
+        #"""The fully decoded model of [filepath], parsed only if it isn't cached yet.
+        #Parses asking for a diagnostics report always run so the report gets written.
+        #A [profiler] times the archive read and write, and the parse by section as LazyCPModel does."""
+        profiler = profiler or Profiler(False)
+        with profiler.phase('cache key', 1, os.path.getsize(filepath)):
+            path = os.path.join(self.directory, cache_key(filepath) + '.npz')
+        
+        if verbosity == QUIET and os.path.exists(path):
+            try:
+                with profiler.phase('cache read', 1, os.path.getsize(path)):
+                    model = read_archive(path)
+                os.utime(path)
+                return model
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                pass #A damaged entry is parsed again and overwritten
+        
+        model = LazyCPModel(filepath, verbosity, profiler=profiler).load()
+        
+        with profiler.phase('cache write', 1):
+            os.makedirs(self.directory, exist_ok=True)
+            write_archive(path, model)
+            self.evict()
+        return model
+    
+    def evict(self):
+        #Batch workers share the directory, so entries can disappear while this runs, and on Windows an entry
+        #another import still has mapped can't be removed. Such entries are skipped, the others are still evicted.
+        entries = []
+        for entry in self.entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort(reverse=True)
+        
+        total = 0
+        for mtime, size, path in entries:
+            total += size
+            if total > self.max_size:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    
+    def clear(self):
+        for entry in self.entries():
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
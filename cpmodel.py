@@ -0,0 +1,1118 @@
+import os
+import json
+import numpy as np
+import mmap
+import struct
+import bisect
+
+from .profiler import Profiler
+
+INT = struct.Struct('<i')
+UINT = struct.Struct('<I')
+SHORT = struct.Struct('<h')
+FLOAT = struct.Struct('<f')
+HALF = struct.Struct('<e')
+
+#Bump whenever the decoded model changes shape, so cached parses of older versions are ignored
+PARSER_VERSION = 2
+
+class CPModelFormatError(ValueError):
+    pass
+
+class Reader:
+    def __init__(self, filepath):
+        with open(filepath, 'rb') as file:
+            #The map stays valid after the file is closed. Empty files can't be mapped.
+            if os.fstat(file.fileno()).st_size > 0:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.map = b''
+        self.data = memoryview(self.map)
+        self.pointer = 0
+        self.markers = {}
+    def position(self):    
+        return hex(self.pointer)
+    def pos(self) -> int:    
+        return self.pointer
+    
+    def read(self, amount) -> memoryview:
+        #"""Return a view of the next [amount] bytes without copying them and advance the pointer"""
+        end = self.pointer+amount
+        temp = self.data[self.pointer:end]
+        self.pointer = end
+        return temp
+    
+    def truncated(self, amount, offset = None):
+        if offset == None:
+            offset = self.pointer
+        raise CPModelFormatError('Unexpected end of file reading 0x{0} bytes at 0x{1}, the file is truncated or corrupt'.format(to_hex(amount), to_hex(offset)))
+    
+    def unpack(self, format):
+        #"""Decode one value of the precompiled struct [format] at the pointer and advance past it"""
+        if self.pointer + format.size > len(self.data):
+            self.truncated(format.size)
+        value = format.unpack_from(self.data, self.pointer)[0]
+        self.pointer += format.size
+        return value
+    
+    def read_byte(self) -> int:
+        #"""Read a byte from the file and advance the pointer 1 byte"""
+        if self.pointer >= len(self.data):
+            self.truncated(1)
+        value = self.data[self.pointer]
+        self.pointer += 1
+        return value
+    
+    def read_int(self, sign="True") -> int:
+        #"""Read an integer from the file and advance the pointer 4 bytes"""
+        return self.unpack(INT if sign else UINT)
+
+    def read_short(self) -> int:
+        #"""Read a short from the file and advance the pointer 2 bytes"""
+        return self.unpack(SHORT)
+
+    def read_float(self) -> float:
+        #"""Read a float from the file and advance the pointer 4 bytes"""
+        return self.unpack(FLOAT)
+
+    def read_half(self) -> float:
+        #"""Read a half from the file and advance the pointer 2 bytes"""
+        return self.unpack(HALF)
+
+    def array_at(self, offset, dtype, count) -> np.ndarray:
+        #"""Return a view of [count] items of [dtype] at [offset] without copying them or moving the pointer"""
+        dtype = np.dtype(dtype)
+        if offset + dtype.itemsize * count > len(self.data):
+            self.truncated(dtype.itemsize * count, offset)
+        return np.frombuffer(self.data, dtype, count, offset)
+
+    def read_array(self, dtype, count) -> np.ndarray:
+        #"""Return a view of the next [count] items of [dtype] without copying them and advance the pointer past them"""
+        array = self.array_at(self.pointer, dtype, count)
+        self.pointer += array.nbytes
+        return array
+
+    def read_string(self, len = 0, clip = 0) -> str:
+        #"""Read a string from the file and advance the pointer [stringLength] bytes. 
+        #If no string length is given, the function will first read an integer describing the length and then read the string"""
+        
+        if len == 0:
+            len = self.read_int()
+            
+        bytes = self.read(len-clip)
+        if clip > 0:
+            self.advance(clip)
+        return str(bytes, 'utf-8')
+    
+    def read_cstring(self) -> str:
+        end = self.map.find(b'\0', self.pointer)
+        if end < 0:
+            end = len(self.data)
+        bytes = self.read(end - self.pointer)
+        self.advance(1)
+        
+        return str(bytes, 'utf-8')
+        
+    def read_matrix(self) -> dict:
+        #"""Read a 3x4 matrix and advance the pointer 48 bytes"""
+        return matrix_dict(self.read_array('<f4', 12))
+    
+
+    def advance(self,amount = 4):
+        #"""Advance the pointer [amount] of bytes or 4 if no amount is given"""
+        self.pointer += amount
+            
+    def marker_offsets(self, marker) -> list:
+        #"""Sorted offsets of every occurrence of the integer [marker] in the file, found in one pass on first use"""
+        if not marker in self.markers:
+            pattern = INT.pack(marker)
+            offsets = []
+            offset = self.map.find(pattern)
+            while offset >= 0:
+                offsets.append(offset)
+                offset = self.map.find(pattern, offset + 1)
+            self.markers[marker] = offsets
+        return self.markers[marker]
+    
+    def advance_to(self,findVal):
+        #"""Advance the pointer to the next offset where the readable value matches [findVal]"""
+        offsets = self.marker_offsets(findVal)
+        index = bisect.bisect_left(offsets, self.pointer)
+        if index == len(offsets):
+            raise CPModelFormatError('Marker 0x{0} not found after 0x{1}, the file is truncated or corrupt'.format(to_hex(findVal), to_hex(self.pointer)))
+        self.pointer = offsets[index]
+        
+def to_hex(inString) -> str:
+    return format(inString, 'x')
+
+#Vertex attribute types: (component type, component count, axis order of the decoded xyzw)
+VERTEX_ATTRIBUTES = {
+    0x6: ('<f4', 3, (0, 2, 1)),         #float3, stored x z y
+    0x8: ('<f2', 2, (0, 1)),            #half2
+    0x9: ('<f2', 4, (0, 2, 1, 3)),      #half4, stored x z y w
+    0xA: ('u1', 4, (0, 1, 2, 3)),       #ubyte4
+    0xB: ('u1', 4, (0, 1, 2, 3)),       #unorm4, scaled to 0-1
+}
+
+def vertex_attribute_format(data_type):
+    if not data_type in VERTEX_ATTRIBUTES:
+        raise CPModelFormatError('Unknown vertex attribute type 0x{0}'.format(to_hex(data_type)))
+    return VERTEX_ATTRIBUTES[data_type]
+
+def vertex_stream_dtype(definitions) -> np.dtype:
+    #"""Build the structured dtype of one vertex out of a vertex stream's definitions"""
+    fields = []
+    for i, definition in enumerate(definitions):
+        component, count, order = vertex_attribute_format(definition['type'])
+        fields.append(('a{0}'.format(i), component, (count,)))
+    return np.dtype(fields)
+
+def decode_vertex_stream(records, definitions) -> list:
+    #"""Split the structured vertex records into one (count, 4) array per attribute.
+    #Floats are swizzled into x y z w order, unorm bytes are normalized to 0-1 and ubyte4 stays uint8."""
+    attributes = []
+    for i, definition in enumerate(definitions):
+        data_type = definition['type']
+        component, count, order = vertex_attribute_format(data_type)
+        values = records['a{0}'.format(i)]
+        
+        if data_type == 0xA:
+            attribute = np.zeros((len(records), 4), np.uint8)
+        else:
+            attribute = np.zeros((len(records), 4), np.float32)
+        attribute[:, :count] = values[:, order]
+        
+        if data_type == 0xB:
+            attribute /= 255.0
+        attributes.append(attribute)
+    return attributes
+
+#Fixed size records read straight into structured arrays. Matrices are the 3x3 block followed by the position and
+#bounding boxes the low and high corner, both as stored in the file's x z y order.
+SUBMODEL_DTYPE = np.dtype([('matrix', '<f4', (12,)), ('bounding_box', '<f4', (6,)), ('name_index', '<i4'), ('model_index', '<i4'),
+                           ('element_count', '<i4'), ('hierarchy_index', '<i4'), ('unknown', '<i4', (3,))])
+ELEMENT_DTYPE = np.dtype([('model_index', '<i4'), ('matrix', '<f4', (12,)), ('bounding_box', '<f4', (6,)), ('name_index', '<i4'),
+                          ('element_index', '<i4'), ('parent', '<i4'), ('unknown', '<i4', (3,)), ('unknown2', '<i2', (2,))])
+
+#Meshes are variable length, their fixed fields are collected into a table and the data1 and data2 lists
+#into tables of their own, addressed by each mesh's <list>_start and <list>_count
+MESH_DTYPE = np.dtype([('material_index', '<i4'), ('definition', '<i4'), ('face_type', '<i4'), ('face_stream_index', '<i4'),
+                       ('object_index', '<i2'), ('data1_start', '<i4'), ('data1_count', '<i4'), ('data2_start', '<i4'), ('data2_count', '<i4')])
+#Both lists are stored with a 52410000 marker ahead of every entry and data2 with another ahead of u5
+MESH_DATA1_DTYPE = np.dtype({'names':['face_offset', 'face_count', 'vert_offset', 'vert_count'], 'formats':['<i4'] * 4,
+                             'offsets':[4, 8, 12, 16], 'itemsize':20})
+MESH_DATA2_DTYPE = np.dtype({'names':['u1', 'u2', 'vOffset', 'u4', 'u5', 'u6'], 'formats':['<i4'] * 6,
+                             'offsets':[4, 8, 12, 16, 24, 28], 'itemsize':32})
+
+#The file's y and z axes are Blender's z and y, swapping them twice gives the file order back
+AXIS_ORDER = [0, 2, 1]
+
+def matrix_dict(values) -> dict:
+    #"""The position of 12 stored matrix floats in Blender's x y z order, and the 3x3 'basis' as stored"""
+    values = [float(value) for value in values]
+    return {'position':[values[9], values[11], values[10]], 'basis':values[:9]}
+
+def blender_matrices(matrices) -> np.ndarray:
+    #"""(N, 4, 4) Blender matrices of (N, 12) stored matrices, with the y and z axes of the 3x3 block and position swapped"""
+    matrices = np.asarray(matrices, np.float64).reshape(-1, 12)
+    result = np.zeros((len(matrices), 4, 4))
+    result[:, :3, :3] = matrices[:, :9].reshape(-1, 3, 3)[:, AXIS_ORDER][:, :, AXIS_ORDER]
+    result[:, :3, 3] = matrices[:, 9:][:, AXIS_ORDER]
+    result[:, 3, 3] = 1.0
+    return result
+
+def parent_order(parents) -> tuple:
+    #"""Element indices ordered so every parent comes before its children, from the [parents] column where -1 is a root.
+    #Depths are found by pointer jumping, doubling the distance followed each round. Returns (order, parents) with the
+    #parents outside the table, in a parent loop or below one set to -1."""
+    parents = np.array(parents, np.int64)
+    count = len(parents)
+    parents[(parents < -1) | (parents >= count)] = -1
+    
+    ancestors = parents.copy()
+    depths = (ancestors >= 0).astype(np.int64)
+    for i in range(max(count, 1).bit_length() + 1):
+        active = np.flatnonzero(ancestors >= 0)
+        if len(active) == 0:
+            break
+        jumps = ancestors[active]
+        depths[active] += depths[jumps]
+        ancestors[active] = ancestors[jumps]
+    
+    looped = ancestors >= 0
+    parents[looped] = -1
+    depths[looped] = 0
+    return np.argsort(depths, kind='stable'), parents
+
+def bounding_box_dict(values) -> tuple:
+    values = [float(value) for value in values]
+    return ({'x':values[0], 'z':values[1], 'y':values[2]}, {'x':values[3], 'z':values[4], 'y':values[5]})
+
+class RecordTable:
+    #"""One section of records as a structured [array]. Columns are read whole for vectorized use, indexing
+    #gives a Record that reads like the dict the parser used to build for it: 'name' is looked up in [names],
+    #'matrix' and 'bounding_box' are decoded, a negative 'parent' is left out and every [lists] table is
+    #sliced by the record's <list>_start and <list>_count into a list of dicts."""
+    def __init__(self, array, names = None, lists = None):
+        self.array = array
+        self.names = names
+        self.lists = lists or {}
+    
+    def __len__(self):
+        return len(self.array)
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.array)
+        if not 0 <= index < len(self.array):
+            raise IndexError(index)
+        return Record(self, index)
+    
+    def __iter__(self):
+        return (Record(self, i) for i in range(len(self.array)))
+    
+    def column(self, key) -> np.ndarray:
+        return self.array[key]
+    
+    def column_names(self) -> list:
+        return [self.names[i] for i in self.array['name_index'].tolist()]
+    
+    def first(self, key) -> np.ndarray:
+        #"""The first entry of list [key] of every record, for the many records that only have one"""
+        empty = np.flatnonzero(self.array[key + '_count'] <= 0)
+        if len(empty) > 0:
+            raise CPModelFormatError('Record {0} has no {1} entries'.format(int(empty[0]), key))
+        return self.lists[key][self.array[key + '_start']]
+    
+    def keys(self, index) -> list:
+        keys = []
+        for field in self.array.dtype.names:
+            if field == 'name_index':
+                keys.append('name')
+            elif field == 'parent':
+                if self.array['parent'][index] >= 0:
+                    keys.append(field)
+            elif field.endswith('_start') and field[:-6] in self.lists:
+                keys.append(field[:-6])
+            elif not (field.endswith('_count') and field[:-6] in self.lists):
+                keys.append(field)
+        keys.append('index')
+        return keys
+    
+    def value(self, index, key):
+        if key == 'name':
+            return self.names[self.array['name_index'][index]]
+        if key == 'index':
+            return index
+        if key in self.lists:
+            start = self.array[key + '_start'][index]
+            rows = self.lists[key][start:start + self.array[key + '_count'][index]]
+            return [dict(zip(rows.dtype.names, row)) for row in rows.tolist()]
+        if key == 'parent' and self.array['parent'][index] < 0:
+            raise KeyError(key)
+        value = self.array[key][index]
+        if key == 'matrix':
+            return matrix_dict(value)
+        if key == 'bounding_box':
+            return bounding_box_dict(value)
+        return value.tolist()
+
+class Record:
+    #"""A view of row [index] of a RecordTable"""
+    __slots__ = ('table', 'index')
+    
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+    
+    def __getitem__(self, key):
+        return self.table.value(self.index, key)
+    
+    def __contains__(self, key):
+        return key in self.table.keys(self.index)
+    
+    def get(self, key, default = None):
+        return self[key] if key in self else default
+    
+    def keys(self) -> list:
+        return self.table.keys(self.index)
+    
+    def items(self) -> list:
+        return [(key, self[key]) for key in self.keys()]
+
+#Verbosity levels of the parser
+QUIET = 0   #No diagnostics at all
+REPORT = 1  #Write the diagnostics of every record to a JSON report next to the model
+
+class ParseReport:
+    #"""Diagnostic information collected while parsing, written as a single JSON file"""
+    def __init__(self, filepath):
+        self.report = {'file':filepath, 'offsets':{}}
+    
+    def add(self, group, record):
+        self.report.setdefault(group, []).append(record)
+    
+    def offset(self, name, offset):
+        self.report['offsets'][name] = offset
+    
+    def write(self, filepath):
+        with open(filepath, 'w') as file:
+            json.dump(self.report, file, indent=1)
+
+def report_path(filepath) -> str:
+    return os.path.splitext(filepath)[0] + '.report.json'
+
+def triangulate_faces(stream_faces, face_type, face_start, face_count, vert_offset = 0) -> np.ndarray:
+    #"""Turn a range of a face stream into an (N, 3) array of triangle indices relative to [vert_offset].
+    #Face type 0 is a triangle list and face type 1 a triangle strip. Degenerate and duplicate
+    #triangles are dropped, keeping the first occurrence of every triangle."""
+    indices = np.asarray(stream_faces[face_start:face_start + face_count], np.int64) - vert_offset
+    
+    if face_type == 0:
+        triangles = indices[:len(indices) - len(indices) % 3].reshape(-1, 3)
+    elif face_type == 1:
+        if len(indices) < 3:
+            return np.zeros((0, 3), np.int64)
+        triangles = np.stack((indices[:-2], indices[1:-1], indices[2:]), axis=1)
+        #Every other strip triangle has its winding flipped
+        even = triangles[0::2].copy()
+        triangles[0::2, 1] = even[:, 2]
+        triangles[0::2, 2] = even[:, 1]
+    else:
+        raise CPModelFormatError('Unknown face type {0}'.format(face_type))
+    
+    degenerate = (triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2]) | (triangles[:, 2] == triangles[:, 0])
+    triangles = triangles[~degenerate]
+    
+    _, first = np.unique(np.sort(triangles, axis=1), axis=0, return_index=True)
+    return triangles[np.sort(first)]
+
+def inside_triangles(triangles, vert_count) -> np.ndarray:
+    #"""Which rows of [triangles] only use vertices in [0, vert_count). A wrong face stream or corrupt data points outside them."""
+    return ((triangles >= 0) & (triangles < vert_count)).all(axis=1)
+
+def mesh_vertex_streams(model) -> tuple:
+    #"""(streams, starts, attribute_counts) arrays with the vertex stream of every mesh, matched by the attribute types of its
+    #definition, the index of its first vertex in that stream and the number of attributes its definition has"""
+    defined_vertex_streams = {}
+    for i, vs in enumerate(model['vertex_streams']):
+        defined_vertex_streams[''.join([to_hex(definition['type']) for definition in vs['definition']])] = i
+    
+    meshes = model['meshes'].array
+    definition_streams = {}
+    for index in np.unique(meshes['definition']).tolist():
+        definition = [item for item in model['vert_definitions'][index] if item['prefix'] == 0]
+        definition_streams[index] = (defined_vertex_streams[''.join([to_hex(item['type']) for item in definition])], len(definition))
+    
+    definitions = meshes['definition'].tolist()
+    streams = np.array([definition_streams[index][0] for index in definitions], np.int64)
+    attribute_counts = np.array([definition_streams[index][1] for index in definitions], np.int64)
+    stream_bytes = np.array([vs['bytes'] for vs in model['vertex_streams']] or [1], np.int64)[streams]
+    starts = model['meshes'].first('data2')['vOffset'] // stream_bytes + model['meshes'].first('data1')['vert_offset']
+    return streams, starts, attribute_counts
+
+def vertex_stream_data(reader, stream) -> list:
+    #"""Decode the per-attribute arrays of a parsed vertex [stream]"""
+    records = reader.array_at(stream['start'], vertex_stream_dtype(stream['definition']), stream['count'])
+    return decode_vertex_stream(records, stream['definition'])
+
+def face_stream_data(reader, stream) -> np.ndarray:
+    #"""The uint16 indices of a parsed face [stream] as a view into the file"""
+    return reader.array_at(stream['start'], '<u2', stream['count'])
+
+def texture_payload(reader, texture) -> memoryview:
+    #"""The payload of a parsed [texture] as a view into the file"""
+    return reader.data[texture['start']:texture['start'] + texture['length'] - 0x1c]
+
+def stream_cpmodel(filepath, payloads = True):
+    #"""Yield the (kind, index, record) tuples of iter_cpmodel for the model at [filepath] as the file is parsed.
+    #With [payloads] vertex streams come with their decoded 'attributes', face streams with their 'faces' and textures with
+    #their 'data', decoded only as each record is reached. Nothing is held on to once a record is yielded, so memory stays
+    #bounded by the largest single record instead of the whole model."""
+    reader = Reader(filepath)
+    for kind, index, record in iter_cpmodel(reader):
+        if payloads:
+            if kind == 'vertex_stream':
+                record = dict(record, attributes=vertex_stream_data(reader, record))
+            elif kind == 'face_stream':
+                record = dict(record, faces=face_stream_data(reader, record))
+            elif kind == 'texture':
+                record = dict(record, data=texture_payload(reader, record))
+        yield kind, index, record
+
+def read_cpmodel_data(self, filepath, verbosity = QUIET, profiler = None):
+    return LazyCPModel(filepath, verbosity, profiler=profiler).load()
+
+class LazyCPModel:
+    #"""A model opened from [filepath] with only its structure parsed.
+    #Vertex streams, face streams and texture payloads are decoded on first access and cached.
+    #With a REPORT [verbosity] the parse diagnostics are written to [report_file], next to the model by default.
+    #A [profiler] times the structure parse by section and load() by payload type."""
+    def __init__(self, filepath, verbosity = QUIET, report_file = None, profiler = None):
+        self.filepath = filepath
+        self.reader = Reader(filepath)
+        self.profiler = profiler
+        
+        self.report = None
+        if verbosity >= REPORT:
+            self.report = ParseReport(filepath)
+        
+        self.model = parse_cpmodel(self.reader, self.report, profiler)
+        
+        if self.report:
+            self.report.write(report_file or report_path(filepath))
+        self.vertex_cache = {}
+        self.face_cache = {}
+        self.texture_cache = {}
+    
+    def __getitem__(self, key):
+        return self.model[key]
+    
+    def __contains__(self, key):
+        return key in self.model
+    
+    def vertex_stream(self, index) -> list:
+        #"""The per-attribute arrays of vertex stream [index]"""
+        if not index in self.vertex_cache:
+            self.vertex_cache[index] = vertex_stream_data(self.reader, self.model['vertex_streams'][index])
+        return self.vertex_cache[index]
+    
+    def face_stream(self, index) -> np.ndarray:
+        #"""The uint16 indices of face stream [index]"""
+        if not index in self.face_cache:
+            self.face_cache[index] = face_stream_data(self.reader, self.model['face_streams'][index])
+        return self.face_cache[index]
+    
+    def texture_data(self, index) -> memoryview:
+        #"""The payload of texture [index] as a view into the file"""
+        if not index in self.texture_cache:
+            self.texture_cache[index] = texture_payload(self.reader, self.model['textures'][index])
+        return self.texture_cache[index]
+    
+    def load(self) -> dict:
+        #"""Decode every payload and return the whole model as one dict"""
+        profiler = self.profiler or Profiler(False)
+        model = dict(self.model)
+        
+        with profiler.phase('decode vertex_streams', sum(stream['count'] for stream in self.model['vertex_streams']),
+                            sum(stream['count'] * vertex_stream_dtype(stream['definition']).itemsize for stream in self.model['vertex_streams'])):
+            model['vertex_streams'] = [dict(stream, attributes=self.vertex_stream(i)) for i, stream in enumerate(self.model['vertex_streams'])]
+        with profiler.phase('decode face_streams', sum(stream['count'] for stream in self.model['face_streams']),
+                            sum(stream['count'] * 2 for stream in self.model['face_streams'])):
+            model['face_streams'] = [dict(stream, faces=self.face_stream(i)) for i, stream in enumerate(self.model['face_streams'])]
+        with profiler.phase('decode textures', len(self.model['textures']), sum(texture['length'] - 0x1c for texture in self.model['textures'])):
+            model['textures'] = [dict(texture, data=self.texture_data(i)) for i, texture in enumerate(self.model['textures'])]
+        return model
+
+#The records iter_cpmodel yields, by kind: the model dict key they are collected under and whether
+#the kind is a single record holding the whole list instead of one record per item.
+RECORD_KINDS = {
+    'names':('names', True),
+    'models':('models', True),
+    'elements':('elements', True),
+    'vertex_definition':('vert_definitions', False),
+    'fx_file':('fx_files', False),
+    'texture':('textures', False),
+    'vertex_stream':('vertex_streams', False),
+    'face_stream':('face_streams', False),
+    'rendering_data':('rendering_data', True),
+    'shaders':('shaders', True),
+    'meshes':('meshes', True),
+}
+
+def parse_cpmodel(reader, report = None, profiler = None):
+    #"""Parse the section structure of a model: names, elements, definitions and the offsets and counts of every payload.
+    #If a ParseReport is given, the unknown fields, offsets and section lengths of every record are added to it.
+    #If a Profiler is given, every section between those offsets is timed as its own phase."""
+    
+    model = {key:[] for key, single in RECORD_KINDS.values()}
+    for kind, index, record in iter_cpmodel(reader, report, profiler):
+        key, single = RECORD_KINDS[kind]
+        if single:
+            model[key] = record
+        else:
+            model[key].append(record)
+    
+    #bpy.context.scene['last_model'] = model
+    
+    return model
+
+def iter_cpmodel(reader, report = None, profiler = None):
+    #"""Parse the section structure of a model as it is read, yielding a (kind, index, record) tuple for every record.
+    #The kinds are listed in RECORD_KINDS. The submodels, elements and meshes come as one RecordTable each, the
+    #definitions, textures and streams one record at a time. Only the names and fx files are kept while parsing, so
+    #the records a consumer has finished with can be dropped. The [report] and [profiler] are filled in as by parse_cpmodel."""
+    
+    if profiler:
+        profiler.begin('parse header', reader.pos())
+    
+    r_pos = reader.pos
+    r_int = reader.read_int
+    r_string = reader.read_string
+    r_cstring = reader.read_cstring
+    r_float = reader.read_float
+    r_short = reader.read_short
+    r_byte = reader.read_byte
+    r_array = reader.read_array
+    r_ad = reader.advance
+    
+    def r_bb():
+        return ({'x':r_float(), 'z':r_float(), 'y':r_float()}, {'x':r_float(), 'z':r_float(), 'y':r_float()})
+    def r_sec(len, clip):
+        sections.append({'title':r_string(len, clip), 'start':r_pos()-len, 'length':r_int(), 'end':r_int()})
+    
+    def readTexture():
+        name = r_string()
+        tu1 = r_int()
+        
+        r_ad() #52410000
+        r_ad() #52410000
+        r_ad() #02000000
+        
+        name2 = r_string()
+        r_ad()
+        
+        tu2 = r_int()
+        tu3 = r_int()
+        tu4 = r_int()
+        tu5 = r_int()
+        tu6 = r_int()
+        tu7 = r_int()
+        tu8 = r_int()
+        tu9 = r_int()
+        tu10 = r_int()
+        tu11 = r_int()
+        tu12 = r_int()
+        
+        length = r_int()
+        height = r_int()
+        width = r_int()
+        
+        tu13 = r_int()
+        
+        mipmaps = r_int()
+        dxt = r_int()
+        
+        tu14 = r_int()
+        tu15 = r_int()
+        
+        pitch = int((width * 1024 + 7)/8)
+        start = r_pos()
+        if report:
+            report.add('textures', {'index':i, 'name':name, 'name2':name2, 'dxt':dxt, 'width':width, 'height':height, 'mipmaps':mipmaps,
+                                    'pitch':pitch, 'start':start, 'length':length, 'unknown1':tu1, 'unknown2':[tu2, tu3, tu4, tu5, tu6, tu7, tu8, tu9, tu10, tu11],
+                                    'unknown3':tu12, 'unknown4':[tu13, tu14, tu15]})
+        
+        r_ad(length - 0x1c)
+        
+        texture = {}
+        texture['name'] = name
+        texture['name2'] = name2
+        texture['dxt'] = dxt
+        texture['width'] = width
+        texture['height'] = height
+        texture['length'] = length
+        texture['mipmaps'] = mipmaps
+        texture['pitch'] = pitch
+        texture['start'] = start
+        return texture
+    
+    def renderListNode_Cull():
+        pass
+    def renderListNode_Common():
+        pass
+    
+    sections = []
+    
+    sections.append((r_string(4), 0, 0)) #..CP
+    
+    r_sec(8, 3) #Model
+    
+    r_sec(8, 2) #Header
+    r_ad()
+    
+    r_sec(8, 2) #MdlDat
+    
+    r_sec(8, 2) #Header
+    r_ad()
+    
+    
+    model_count = r_int()
+    element_count = r_int()
+    if profiler:
+        profiler.count(model_count + element_count)
+    r_ad()
+    model_bb = r_bb()
+    
+    r_sec(8, 2) #5
+    
+    nameOffsets = []
+    for i in range(r_int() + 1):
+        nameOffsets.append(r_int())
+    
+    names = [r_cstring() for i in range(1, len(nameOffsets))]
+    
+    yield 'names', None, names
+    
+    r_sec(8, 2) #Models
+    models = RecordTable(r_array(SUBMODEL_DTYPE, model_count), names)
+    if report:
+        for i, submodel in enumerate(models):
+            report.add('models', {'index':i, 'name':submodel['name'], 'matrix':submodel['matrix'], 'bounding_box':submodel['bounding_box'],
+                                  'child_count':submodel['element_count'], 'unknown':submodel['unknown']})
+    yield 'models', None, models
+    
+    r_sec(8, 1) #Elements
+    elements = RecordTable(r_array(ELEMENT_DTYPE, element_count), names)
+    if report:
+        for i, element in enumerate(elements):
+            report.add('elements', {'index':i, 'name':element['name'], 'matrix':element['matrix'], 'bounding_box':element['bounding_box'],
+                                    'parent':int(elements.column('parent')[i]), 'model':element['model_index'], 'model_element':element['element_index'],
+                                    'unknown':element['unknown'], 'unknown2':element['unknown2']})
+    yield 'elements', None, elements
+    
+    r_sec(8, 2) #8 Constr
+    
+    r_sec(8, 2) #9 Render
+    
+    r_sec(8, 2) #10 Render
+    
+    r_sec(8, 2) #11 Header
+    r_ad()
+    
+    r_sec(8, 3) #12 Scene
+    
+    r_ad() #ARCH
+    r_ad(8) #01000000 00000000
+    
+    r_ad() #ARCH
+    r_ad(8) #00000000 01000000
+    
+    r_ad(12)  # 52410100 52410000 02000000
+    
+    r_ad(8) #52410000 00000000
+    r_ad(8) #52410000 #52410200
+    r_ad(8) #52410000 #00000000
+    
+    r_ad() #52410000
+    
+    if report:
+        report.offset('arch_data', r_pos())
+    if profiler:
+        profiler.begin('parse arch_data', r_pos())
+    arch_dats = [0] * r_int()
+    if profiler:
+        profiler.count(len(arch_dats))
+    for i in range(len(arch_dats)):
+        ad1 = r_int()
+        ad2 = r_int()
+        arch_dats[i] = (ad1, ad2)
+    
+    
+    r_ad(0xc) #FFFFFFFFFFFF
+    r_ad(8) #00000000 52410000
+    r_ad(0x20) #Unknown
+    r_ad(8) #52410000 Unknown
+    r_ad() #52410000
+    
+    ff_Count = r_int()
+    r_ad(ff_Count+4)
+    
+    r_ad(8) #52410000 00000000
+    
+    r_ad(8) #52410000 00000000
+    
+    r_ad() #52410000
+    
+    if report:
+        report.offset('vertex_definitions', r_pos())
+    if profiler:
+        profiler.begin('parse vertex_definitions', r_pos())
+    vert_definition_count = r_int()
+    if profiler:
+        profiler.count(vert_definition_count)
+    for i in range(vert_definition_count):
+        r_ad()
+        
+        data = [0] * r_int()
+        for j in range(len(data)):
+            r_ad()
+            type_prefix = r_short()
+            offset = r_short()
+            data_type = r_int()
+            r_ad()
+            channel = r_int()
+            sub_channel = r_byte()
+            
+            definition = {}
+            definition['prefix'] = type_prefix
+            definition['offset'] = offset
+            definition['type'] = data_type
+            definition['channel'] = channel
+            definition['sub_channel'] = sub_channel
+            data[j] = definition
+        yield 'vertex_definition', i, data
+    
+    
+    r_ad()
+    if report:
+        report.offset('fx_files', r_pos())
+    if profiler:
+        profiler.begin('parse fx_files', r_pos())
+    fx_files = [0] * r_int()
+    if profiler:
+        profiler.count(len(fx_files))
+    for i in range(len(fx_files)):
+        r_ad()
+        r_ad()
+        file_name = r_string()
+        
+        fx_files[i] = file_name
+        yield 'fx_file', i, file_name
+    
+    r_ad()
+    r_ad() #52410000
+    r_ad() #52410000
+    r_ad() #02000000
+    
+    if report:
+        report.offset('textures', r_pos())
+    if profiler:
+        profiler.begin('parse textures', r_pos())
+    texture_count = r_int()
+    if profiler:
+        profiler.count(texture_count)
+    
+    for i in range(texture_count):
+        yield 'texture', i, readTexture()
+        
+    
+    r_ad(8) #52410000 52410300
+    r_ad(8) #52410000 00000000
+    r_ad(8) #52410000 00000000
+    r_ad(8) #52410000 00000000
+    r_ad(8) #52410000 00000000
+    r_ad(8) #52410000 00000000
+    r_ad() #01000000
+    
+    r_ad() #52410000
+    r_ad(7) #03000000 000002
+    r_ad() #52410000
+    r_ad() #52410000
+    r_ad(8) #52410000 00000000
+    r_ad(8) #00000000 00000000
+
+    uvsd1 = r_int()
+    r_ad() #52410000
+    r_ad() #52410000
+    r_ad(8) #02000000 0A000000
+    r_ad() #52410000
+    r_ad() #52410000
+    r_ad(8) #02000000 00000000
+    r_ad() #52410000
+    
+    if report:
+        report.offset('vertex_streams', r_pos())
+    if profiler:
+        profiler.begin('parse vertex_streams', r_pos())
+    vertex_stream_count = r_int()
+    if profiler:
+        profiler.count(vertex_stream_count)
+    
+    for i in range(vertex_stream_count):
+        r_ad(1) #02
+        r_ad() #52410100
+        r_ad() #52410000
+        
+        byte_length = r_int()
+        
+        r_ad()
+        vert_stream_definitions = [0] * r_int()
+        for j in range(len(vert_stream_definitions)):
+            r_ad()
+            data_type = r_int()
+            unknown_vert_stream_data = r_int()
+            channel = r_int()
+            sub_channel = r_int()
+            
+            definition = {}
+            definition['type'] = data_type
+            definition['unknown'] = unknown_vert_stream_data
+            definition['channel'] = channel
+            definition['sub_channel'] = sub_channel
+            vert_stream_definitions[j] = definition
+        
+        r_ad()
+        vert_data_offsets = [r_short() for j in range(r_int())]
+        
+        vertex_count = r_int()
+        r_ad()
+        vertex_stream_length = r_int()
+        r_ad()
+        r_ad(vertex_stream_length)
+        if i == vertex_stream_count - 1:
+            reader.advance_to(0x4152)
+        else:
+            reader.advance_to(0x1415202)
+        
+        r_ad(-vertex_stream_length)
+        
+        start = r_pos()
+        
+        r_ad(vertex_stream_dtype(vert_stream_definitions).itemsize * vertex_count)
+        
+        if report:
+            report.add('vertex_streams', {'index':i, 'definition':vert_stream_definitions, 'offsets':vert_data_offsets, 'start':start,
+                                          'length':vertex_stream_length, 'count':vertex_count, 'bytes':byte_length})
+        
+        stream = {}
+        stream['bytes'] = byte_length
+        stream['count'] = vertex_count
+        stream['length'] = vertex_stream_length
+        stream['start'] = start
+        stream['definition'] = vert_stream_definitions
+        yield 'vertex_stream', i, stream
+    
+    r_ad()
+    if report:
+        report.offset('face_streams', r_pos())
+    if profiler:
+        profiler.begin('parse face_streams', r_pos())
+    face_stream_count = r_int()
+    if profiler:
+        profiler.count(face_stream_count)
+    
+    for i in range(face_stream_count):
+        r_ad(1) #02
+        r_ad() #52410100
+        
+        face_count = r_int()
+        
+        r_ad() #00000000
+        r_ad() #52410000
+        
+        face_stream_length = r_int()
+        
+        r_ad() #10000000
+        
+        r_ad(face_stream_length)
+        
+        if i == face_stream_count - 1:
+            reader.advance_to(0x4152)
+        else:
+            reader.advance_to(0x1415202)
+        
+        r_ad(-face_stream_length)
+        start = r_pos()
+        
+        r_ad(face_count * 2)
+        
+        if report:
+            report.add('face_streams', {'index':i, 'start':start, 'length':face_stream_length, 'count':face_count})
+        
+        stream = {}
+        stream['start'] = start
+        stream['length'] = face_stream_length
+        stream['count'] = face_count
+        yield 'face_stream', i, stream
+    
+    r_ad() #52410000
+    
+    
+    if report:
+        report.offset('rendering_data', r_pos())
+    if profiler:
+        profiler.begin('parse rendering_data', r_pos())
+    rendering_data = [0] * r_int()
+    if profiler:
+        profiler.count(len(rendering_data))
+    for i in  range(len(rendering_data)):
+        r_ad(1) #03
+        node_name = r_string()
+        
+        if(node_name == "RenderingData::CullNode"):
+            pass
+        elif(node_name == "RenderingData::RenderListNode_Common"):
+            pass
+        
+        common = r_int() #52410200
+        if common == 0x4152:
+            r_ad(0x58)
+            ff_count = r_int()
+            r_ad(ff_count + 4)
+            break
+        
+        r_ad() #52410000
+        modelName = r_string()
+        r_ad() #52410000
+        udat = [(r_int(), r_int()) for j in range(r_int())]
+        
+        urd1 = r_int()
+        urd2 = r_int()
+        urd3 = r_int()
+        urd4 = r_int()
+        
+        r_ad()
+        
+        bbox = r_bb()
+        urdf1 = r_float()
+        urdf2 = r_float()
+        
+        r_ad()
+        
+        urd5 = r_int()
+        
+        r_ad()
+        
+        if report:
+            report.add('rendering_data', {'index':i, 'node':node_name, 'common':common, 'model':modelName, 'unknown1':udat,
+                                          'unknown2':[urd1, urd2, urd3, urd4], 'bounding_box':bbox, 'unknown3':[urdf1, urdf2], 'unknown4':urd5})
+        
+        ff_count = r_int()
+        r_ad(ff_count+4)
+        r_ad() #52410000
+        r_ad() #00000000
+        r_ad() #52410000
+        r_ad() #00000000
+    
+    yield 'rendering_data', None, rendering_data
+    
+    r_ad() #52410000
+    r_ad() #00000000
+    r_ad() #52410000
+    r_ad() #00000000
+    r_ad() #52410000
+    r_ad() #52410000
+    
+    if report:
+        report.offset('shaders', r_pos())
+    if profiler:
+        profiler.begin('parse shaders', r_pos())
+    shaders = [0] * r_int()
+    if profiler:
+        profiler.count(len(shaders))
+    
+    for i in range(len(shaders)):
+        r_ad()
+        name_length = r_int()
+        if name_length == 0:
+            r_ad()
+            urdv1 = (r_int(), r_int(), r_int())
+            r_ad()
+            urdv2 = (r_int(), r_int(), r_int())
+            if report:
+                report.add('shaders', {'index':i, 'unknown':[urdv1, urdv2]})
+            continue
+        fx_name = r_string(name_length)
+        r_ad()
+        
+        parameters = [{} for j in range(r_int())]
+        
+        for param in parameters:
+            r_ad()
+            param_name = r_string()
+            param_values = [r_int(), r_int()]
+            param['name'] = param_name
+            param['values'] = param_values
+        
+        extra_params = [r_int() for j in range(2)]
+        r_ad()
+        
+        other_params = [r_short() for j in range(r_int() + 1)]
+        if report:
+            report.add('shaders', {'index':i, 'fx':fx_name, 'params':parameters, 'extra_params':extra_params, 'other_params':other_params})
+        r_ad(6)
+    
+    yield 'shaders', None, shaders
+    
+    r_ad()
+    r_ad()
+    
+    r_ad()
+    
+    if report:
+        report.offset('meshes', r_pos())
+    if profiler:
+        profiler.begin('parse meshes', r_pos())
+    mesh_count = r_int()
+    if profiler:
+        profiler.count(mesh_count)
+    meshes = np.zeros(mesh_count, MESH_DTYPE)
+    mesh_data_1 = []
+    mesh_data_2 = []
+    data1_count = 0
+    data2_count = 0
+    for i in range(mesh_count):
+        r_ad()
+        material_index = r_int()
+        definition_index = r_int()
+        face_type = r_int()
+        face_stream_index = r_int()
+        object_index = r_short()
+        mud2 = r_short()
+        
+        r_ad()
+        mud3 = r_int()
+        mud4 = r_int()
+        
+        r_ad()
+        mud5 = r_int()
+        mud6 = r_int()
+        
+        r_ad() #52410000
+        r_ad() #01000000
+        r_ad() #05000000
+        r_ad() #00000000
+        r_ad() #00000000
+        r_ad() #01000000
+        r_ad() #00000000
+        
+        r_ad() #52410000
+        
+        data1 = r_array(MESH_DATA1_DTYPE, r_int())
+        
+        r_ad() #52410000
+        
+        data2 = r_array(MESH_DATA2_DTYPE, r_int())
+        
+        meshes[i] = (material_index, definition_index, face_type, face_stream_index, object_index,
+                     data1_count, len(data1), data2_count, len(data2))
+        mesh_data_1.append(data1)
+        mesh_data_2.append(data2)
+        data1_count += len(data1)
+        data2_count += len(data2)
+        
+        if report:
+            report.add('meshes', {'index':i, 'material':fx_files[material_index], 'definition':definition_index, 'face_type':face_type,
+                                  'face_stream':face_stream_index, 'object':elements[object_index]['name'], 'unknown2':mud2,
+                                  'unknown3':[mud3, mud4], 'unknown4':[mud5, mud6],
+                                  'data1':[dict(zip(data1.dtype.names, row)) for row in data1.tolist()],
+                                  'data2':[dict(zip(data2.dtype.names, row)) for row in data2.tolist()]})
+    
+    lists = {}
+    lists['data1'] = np.concatenate(mesh_data_1) if mesh_data_1 else np.zeros(0, MESH_DATA1_DTYPE)
+    lists['data2'] = np.concatenate(mesh_data_2) if mesh_data_2 else np.zeros(0, MESH_DATA2_DTYPE)
+    yield 'meshes', None, RecordTable(meshes, lists=lists)
+    
+    if profiler:
+        profiler.end(r_pos())
+    
+    if report:
+        report.report['sections'] = sections
+        report.report['bounding_box'] = model_bb
+
+
+if __name__ == "__main__":
+    #Standalone use outside Blender: python -m BlurImportExport.cpmodel [--report] files...
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Parse CPModel files and print a summary of their contents")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--report', action='store_true', help="write a .report.json next to each model")
+    args = parser.parse_args()
+    
+    for filepath in args.files:
+        model = LazyCPModel(filepath, REPORT if args.report else QUIET)
+        print('{0}: {1} elements, {2} textures, {3} vertex streams ({4} vertices), {5} face streams, {6} meshes'.format(
+            filepath, len(model['elements']), len(model['textures']), len(model['vertex_streams']),
+            sum(stream['count'] for stream in model['vertex_streams']), len(model['face_streams']), len(model['meshes'])))
@@ -0,0 +1,88 @@
+import os
+import re
+import struct
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+#The 128 byte header written in front of every texture payload, packed in one call
+DDS_HEADER = struct.Struct(
+    '<4s'   #Magic 'DDS '
+    '7I'    #Header Size, Flags, Height, Width, Pitch, Depth, MipMapCount
+    '44x'   #dwReserved1[11]
+    '7I'    #Pixel Format Size, Pixel Format Flags, FourCC, Red, Blue, Green and Alpha Bit Masks
+    '6I'    #Caps, Caps2, Caps3, Caps4, Reserved2 and one more unknown
+)
+
+def texture_size(texture) -> tuple:
+    #"""(width, height) of [texture]. The header stores its width field as the height and the other way around."""
+    return texture['height'], texture['width']
+
+def dds_header(texture) -> bytes:
+    width, height = texture_size(texture)
+    return DDS_HEADER.pack(
+        b'DDS ', 0x7c, 0xa1007, height, width, texture['pitch'], 0x0, texture['mipmaps'],
+        0x20, 0x4, texture['dxt'], 0x0, 0x0, 0x0, 0x0,
+        0x0, 0x401008, 0x0, 0x0, 0x0, 0x0,
+    )
+
+def texture_directory(directory) -> str:
+    return os.path.join(directory, 'textures')
+
+def texture_path(directory, texture) -> str:
+    #"""Where [texture] is written inside [directory]. Texture names use \\ as their separator whatever the platform, / is
+    #split on too. Names come from the model file, so empty, . and .. components and drive letters are dropped."""
+    parts = [re.sub(r'^[A-Za-z]:', '', part) for part in re.split(r'[\\/]', texture['name'])]
+    parts = [part for part in parts if not part in ('', '.', '..')]
+    return os.path.join(texture_directory(directory), *(parts or ['texture'])) + '.dds'
+
+def file_hash(filepath) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+def write_texture(filepath, texture) -> bool:
+    #"""Write [texture] as a .dds at [filepath] unless an identical file is already there. Returns whether it was written."""
+    header = dds_header(texture)
+    data = memoryview(texture['data'])
+    
+    if os.path.exists(filepath) and os.path.getsize(filepath) == len(header) + data.nbytes:
+        digest = hashlib.blake2b(header, digest_size=16)
+        digest.update(data)
+        if file_hash(filepath) == digest.digest():
+            return False
+    
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'wb') as file:
+        file.write(header)
+        file.write(data)
+    return True
+
+def payload_hash(texture) -> str:
+    digest = hashlib.blake2b(dds_header(texture), digest_size=4)
+    digest.update(memoryview(texture['data']))
+    return digest.hexdigest()
+
+def texture_paths(directory, textures) -> list:
+    #"""texture_path of every texture. Textures sharing a name but not their payload get the payload hash
+    #added to the file name, so they don't overwrite each other."""
+    filepaths = [texture_path(directory, texture) for texture in textures]
+    payloads = {}
+    for filepath, texture in zip(filepaths, textures):
+        payloads.setdefault(filepath, set()).add(payload_hash(texture))
+    return [filepath[:-4] + '.' + payload_hash(texture) + '.dds' if len(payloads[filepath]) > 1 else filepath
+            for filepath, texture in zip(filepaths, textures)]
+
+def extract_textures(textures, directory, workers = None) -> tuple:
+    #"""Write every texture as a .dds under [directory]/textures on a pool of [workers] threads, every file once.
+    #Returns the path of every texture in order and whether its file was written, False when it was already there."""
+    filepaths = texture_paths(directory, textures)
+    root = os.path.abspath(texture_directory(directory))
+    for filepath in filepaths:
+        if not os.path.commonpath([root, os.path.abspath(filepath)]) == root:
+            raise ValueError("Texture file {0} is outside {1}".format(filepath, root))
+    unique = dict(zip(filepaths, textures))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        written = dict(zip(unique.keys(), executor.map(write_texture, unique.keys(), unique.values())))
+    return filepaths, [written[filepath] for filepath in filepaths]
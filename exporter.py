@@ -0,0 +1,273 @@
+import os
+
+import numpy as np
+
+from .cpmodel import CPModelFormatError, vertex_stream_dtype, AXIS_ORDER
+from .writer import write_cpmodel, EMPTY_BOUNDING_BOX
+from .geometry import split_corners
+from .registry import MATERIAL_FX
+
+#---------------------------------------------------------------------------------------------------
+#---------------------------------------------------------------------------------------------------
+#---------------------------------------------------------------------------------------------------
+#---------------------------------------------------------------------------------------------------
+#---------------------------------------------------------------------------------------------------
+
+#Export options and their defaults
+DEFAULT_OPTIONS = {
+    'use_selection':True,       #Only export the selected objects
+    'apply_modifiers':True,     #Export the meshes with their modifiers applied
+}
+
+def export_options(options) -> dict:
+    return dict(DEFAULT_OPTIONS, **(options or {}))
+
+#Vertex layout of exported meshes: position, normal and the uv sets as (u1, u2, 1-v1, 1-v2), the first
+#color attribute the importer reads its uvs from. Any further Vert_Data_ attributes follow as unorm4 or half4.
+POSITION = 0x6
+NORMAL = 0x6
+UV = 0x9
+COLOR = 0xB
+FLOAT_COLOR = 0x9
+
+MAX_PART_VERTICES = 0x10000
+
+def export_cpmodel(self, context, filepath, options = None):
+    options = export_options(options)
+    
+    if options['use_selection']:
+        objects = [object for object in context.selected_objects if object.type in ('MESH', 'EMPTY')]
+    else:
+        objects = [object for object in context.scene.objects if object.type in ('MESH', 'EMPTY')]
+    
+    if len(objects) == 0:
+        self.report({'WARNING'}, "No mesh or empty objects to export")
+        return {'CANCELLED'}
+    
+    try:
+        model = create_data_from_objects(objects, os.path.splitext(os.path.basename(filepath))[0], options, context.evaluated_depsgraph_get())
+        write_cpmodel(filepath, model)
+    except CPModelFormatError as error:
+        self.report({'ERROR'}, str(error))
+        return {'CANCELLED'}
+    
+    textured = textured_objects(objects)
+    if len(textured) > 0:
+        self.report({'WARNING'}, "Textures aren't exported and materials are only written as their FX name, {0} objects lost their image textures".format(len(textured)))
+    
+    self.report({'INFO'}, "Exported {0} elements, {1} vertices".format(len(model['elements']), sum(len(stream['attributes'][0]) for stream in model['vertex_streams'])))
+    return {'FINISHED'}
+
+def textured_objects(objects) -> list:
+    #"""The mesh [objects] with a material using an image texture, which the model can't carry"""
+    def textured(material):
+        return not material == None and not material.node_tree == None and any(node.type == 'TEX_IMAGE' and not node.image == None for node in material.node_tree.nodes)
+    return [object for object in objects if object.type == 'MESH' and any(textured(slot.material) for slot in object.material_slots)]
+
+def hierarchy_order(objects) -> list:
+    #"""[objects] with every parent ahead of its children, the importer links parents by their earlier index"""
+    def depth(object):
+        count = 0
+        while not object.parent == None:
+            object = object.parent
+            count += 1
+        return count
+    return sorted(objects, key=depth)
+
+def file_matrix(matrix) -> dict:
+    #"""A matrix dict for the writer. Blender's y and z axes are swapped in the file."""
+    basis = np.array(matrix.to_3x3(), np.float64)[AXIS_ORDER][:, AXIS_ORDER]
+    return {'position':list(matrix.translation), 'basis':basis.ravel().tolist()}
+
+def bounding_box(positions) -> tuple:
+    if len(positions) == 0:
+        return EMPTY_BOUNDING_BOX
+    low = positions.min(axis=0)
+    high = positions.max(axis=0)
+    return ({'x':float(low[0]), 'z':float(low[2]), 'y':float(low[1])}, {'x':float(high[0]), 'z':float(high[2]), 'y':float(high[1])})
+
+def mesh_arrays(mesh) -> dict:
+    #"""Pull the geometry of [mesh] into NumPy with foreach_get. Vertices are split wherever a corner's uvs differ."""
+    vert_count = len(mesh.vertices)
+    loop_count = len(mesh.loops)
+    
+    mesh.calc_loop_triangles()
+    tri_count = len(mesh.loop_triangles)
+    
+    positions = np.empty(vert_count * 3, np.float32)
+    mesh.vertices.foreach_get('co', positions)
+    normals = np.empty(vert_count * 3, np.float32)
+    mesh.vertices.foreach_get('normal', normals)
+    
+    loop_vertices = np.empty(loop_count, np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_vertices)
+    
+    tri_loops = np.empty(tri_count * 3, np.int32)
+    mesh.loop_triangles.foreach_get('loops', tri_loops)
+    tri_materials = np.empty(tri_count, np.int32)
+    mesh.loop_triangles.foreach_get('material_index', tri_materials)
+    
+    #The importer's UV1 and UV2, or the first two uv layers of other meshes
+    layers = [mesh.uv_layers.get(name) for name in ('UV1', 'UV2')]
+    if layers[0] == None:
+        layers = list(mesh.uv_layers)[:2]
+    uvs = []
+    for layer in layers:
+        uv = np.zeros(loop_count * 2, np.float32)
+        if not layer == None:
+            layer.data.foreach_get('uv', uv)
+        uvs.append(uv.reshape(-1, 2))
+    while len(uvs) < 2:
+        uvs.append(np.zeros((loop_count, 2), np.float32))
+    loop_uvs = np.stack((uvs[0][:, 0], uvs[1][:, 0], 1 - uvs[0][:, 1], 1 - uvs[1][:, 1]), axis=1)
+    
+    colors = []
+    i = 1
+    while not mesh.attributes.get('Vert_Data_' + str(i)) == None:
+        attribute = mesh.attributes['Vert_Data_' + str(i)]
+        color = np.zeros(vert_count * 4, np.float32)
+        if attribute.domain == 'POINT' and attribute.data_type == 'FLOAT_COLOR':
+            attribute.data.foreach_get('color', color)
+        colors.append(color.reshape(-1, 4))
+        i += 1
+    
+    vertices, corner_index = split_corners(loop_vertices, loop_uvs)
+    #Every corner of a split vertex has the same uvs, any of them will do
+    vertex_corner = np.zeros(len(vertices), np.int64)
+    vertex_corner[corner_index] = np.arange(loop_count)
+    
+    arrays = {}
+    arrays['positions'] = positions.reshape(-1, 3)[vertices]
+    arrays['normals'] = normals.reshape(-1, 3)[vertices]
+    arrays['uvs'] = loop_uvs[vertex_corner]
+    arrays['colors'] = [color[vertices] for color in colors]
+    arrays['triangles'] = corner_index[tri_loops].reshape(-1, 3)
+    arrays['materials'] = tri_materials
+    return arrays
+
+def color_type(color) -> int:
+    #"""unorm4 when every value fits in a byte's 0-1 range, half4 otherwise"""
+    return COLOR if len(color) == 0 or (color.min() >= 0 and color.max() <= 1) else FLOAT_COLOR
+
+def pad4(values) -> np.ndarray:
+    padded = np.zeros((len(values), 4), np.float32)
+    padded[:, :values.shape[1]] = values
+    return padded
+
+def create_data_from_objects(objects, name, options = None, depsgraph = None) -> dict:
+    #"""Build the model dict write_cpmodel writes from Blender [objects]. Every object becomes an element and every
+    #material of a mesh one game mesh, indexing a single triangle list face stream and one vertex stream per vertex layout."""
+    options = export_options(options)
+    objects = hierarchy_order(objects)
+    indices = {object:i for i, object in enumerate(objects)}
+    
+    model = {}
+    model['models'] = [{'name':name, 'matrix':{'position':[0.0, 0.0, 0.0]}, 'bounding_box':EMPTY_BOUNDING_BOX, 'element_count':len(objects)}]
+    model['elements'] = []
+    model['vert_definitions'] = []
+    model['fx_files'] = []
+    model['textures'] = []
+    model['vertex_streams'] = []
+    model['face_streams'] = [{'faces':[]}]
+    model['meshes'] = []
+    
+    fx_indices = {}
+    stream_indices = {}
+    world_positions = []
+    
+    for i, object in enumerate(objects):
+        parent = object.parent if object.parent in indices else None
+        
+        element = {}
+        element['name'] = object.name
+        element['model_index'] = 0
+        element['element_index'] = i
+        element['matrix'] = file_matrix(object.matrix_local if not parent == None else object.matrix_world)
+        element['bounding_box'] = EMPTY_BOUNDING_BOX
+        if not parent == None:
+            element['parent'] = indices[parent]
+        model['elements'].append(element)
+        
+        if not object.type == 'MESH':
+            continue
+        
+        if options['apply_modifiers'] and not depsgraph == None:
+            evaluated = object.evaluated_get(depsgraph)
+            mesh = evaluated.to_mesh()
+        else:
+            evaluated = None
+            mesh = object.data
+        
+        try:
+            arrays = mesh_arrays(mesh)
+            slots = [slot.material for slot in object.material_slots] or [None]
+        finally:
+            if not evaluated == None:
+                evaluated.to_mesh_clear()
+        
+        element['bounding_box'] = bounding_box(arrays['positions'])
+        world = np.array(object.matrix_world, np.float64)
+        world_positions.append(arrays['positions'] @ world[:3, :3].T + world[:3, 3])
+        
+        types = [POSITION, NORMAL, UV] + [color_type(color) for color in arrays['colors']]
+        attributes = [pad4(arrays['positions']), pad4(arrays['normals']), arrays['uvs']] + arrays['colors']
+        
+        #Meshes without faces are exported as bare elements, a stream nothing draws from would stay empty
+        if len(arrays['triangles']) == 0:
+            continue
+        
+        layout = tuple(types)
+        if not layout in stream_indices:
+            stream_indices[layout] = len(model['vertex_streams'])
+            model['vertex_streams'].append({'definition':[{'type':data_type} for data_type in types], 'attributes':[[] for data_type in types]})
+            model['vert_definitions'].append([{'prefix':0, 'type':data_type} for data_type in types])
+        definition_index = stream_indices[layout]
+        stream = model['vertex_streams'][definition_index]
+        
+        for slot_index in np.unique(arrays['materials']):
+            triangles = arrays['triangles'][arrays['materials'] == slot_index]
+            used, local = np.unique(triangles, return_inverse=True)
+            if len(used) > MAX_PART_VERTICES:
+                raise CPModelFormatError("{0} has {1} vertices in one material, more than the 16 bit face indices can address".format(object.name, len(used)))
+            
+            material = slots[min(slot_index, len(slots) - 1)]
+            fx = 'default' if material == None else material.get(MATERIAL_FX, material.name)
+            if not fx in fx_indices:
+                fx_indices[fx] = len(model['fx_files'])
+                model['fx_files'].append(fx + '.fx')
+            
+            vert_base = sum(len(attribute) for attribute in stream['attributes'][0])
+            face_base = sum(len(faces) for faces in model['face_streams'][0]['faces'])
+            
+            for j, attribute in enumerate(attributes):
+                stream['attributes'][j].append(attribute[used])
+            model['face_streams'][0]['faces'].append(local.astype(np.uint16))
+            
+            mesh_record = {}
+            mesh_record['material_index'] = fx_indices[fx]
+            mesh_record['definition'] = definition_index
+            mesh_record['face_type'] = 0
+            mesh_record['face_stream_index'] = 0
+            mesh_record['object_index'] = i
+            mesh_record['data1'] = [{'face_offset':face_base, 'face_count':len(local), 'vert_offset':0, 'vert_count':len(used)}]
+            mesh_record['data2'] = [{'vOffset':0}]
+            mesh_record['vertex_base'] = vert_base
+            model['meshes'].append(mesh_record)
+    
+    #Join the pieces and point every mesh at its vertices, the importer finds them at vOffset / stride
+    for stream in model['vertex_streams']:
+        stream['attributes'] = [np.concatenate(attribute) for attribute in stream['attributes']]
+    model['face_streams'][0]['faces'] = np.concatenate(model['face_streams'][0]['faces'] or [np.zeros(0, np.uint16)])
+    
+    for definitions in model['vert_definitions']:
+        dtype = vertex_stream_dtype(definitions)
+        for j, definition in enumerate(definitions):
+            definition['offset'] = dtype.fields['a{0}'.format(j)][1]
+    for mesh_record in model['meshes']:
+        stride = vertex_stream_dtype(model['vertex_streams'][mesh_record['definition']]['definition']).itemsize
+        mesh_record['data2'][0]['vOffset'] = mesh_record.pop('vertex_base') * stride
+    
+    if len(world_positions) > 0:
+        model['bounding_box'] = bounding_box(np.concatenate(world_positions))
+        model['models'][0]['bounding_box'] = model['bounding_box']
+    return model
@@ -0,0 +1,162 @@
+import numpy as np
+
+#Mesh processing on the decoded NumPy arrays, run before anything is handed to Blender
+
+def vertex_records(positions, colors, tolerance = 0.0) -> np.ndarray:
+    #"""One row per vertex holding every attribute that ends up in the Blender mesh. With a [tolerance]
+    #the values are snapped to a grid of that size, otherwise they are compared exactly."""
+    records = np.concatenate([np.asarray(positions, np.float64)] + [np.asarray(color, np.float64) for color in colors], axis=1)
+    if tolerance > 0:
+        return np.round(records / tolerance).astype(np.int64)
+    #Adding zero turns -0.0 into 0.0 so both compare equal bytewise
+    return records + 0.0
+
+def unique_rows(records) -> tuple:
+    #"""Group the equal rows of the 2D array [records]. Returns (first, index): the first row of every group
+    #in the order they appear and the group of every row."""
+    records = np.ascontiguousarray(records)
+    #Every row as a single opaque value so np.unique compares whole records in one sort
+    packed = records.view(np.dtype((np.void, records.dtype.itemsize * records.shape[1]))).ravel()
+    _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+    
+    #np.unique orders the groups by their bytes, renumber them by first occurrence instead
+    order = np.argsort(first)
+    rank = np.empty(len(first), np.int64)
+    rank[order] = np.arange(len(first))
+    return first[order], rank[inverse.ravel()]
+
+def weld_vertices(positions, colors, triangles, tolerance = 0.0) -> tuple:
+    #"""Merge vertices whose position and colors are equal, or within [tolerance] of each other.
+    #Returns (positions, colors, triangles) with the first vertex of every group kept in the original order,
+    #the triangles remapped onto them and the ones that collapsed or became duplicates removed."""
+    vert_count = len(positions)
+    if vert_count == 0:
+        return positions, colors, triangles
+    
+    keep, remap = unique_rows(vertex_records(positions, colors, tolerance))
+    
+    triangles = remap[triangles]
+    valid = (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 0] != triangles[:, 2])
+    triangles = triangles[valid]
+    
+    #Triangles that only differed by their vertices' copies are now the same face
+    _, unique = np.unique(np.sort(triangles, axis=1), axis=0, return_index=True)
+    
+    return positions[keep], [color[keep] for color in colors], triangles[np.sort(unique)]
+
+def split_corners(corner_vertices, corner_values) -> tuple:
+    #"""Turn per corner data into per vertex data. Every distinct (vertex, values) pair of the [corner_vertices]
+    #and their (corners, n) [corner_values] becomes one vertex, so a vertex on a uv seam is split in two.
+    #Returns (vertices, corner_index): the source vertex of every split vertex and the split vertex of every corner."""
+    corner_vertices = np.asarray(corner_vertices)
+    records = np.concatenate([corner_vertices.astype(np.float64)[:, None], np.asarray(corner_values, np.float64)], axis=1) + 0.0
+    first, corner_index = unique_rows(records)
+    return corner_vertices[first], corner_index
+
+def cache_misses(triangles, cache_size = 32) -> int:
+    #"""Vertex shader runs needed to draw [triangles] in order through a FIFO post-transform cache of [cache_size] entries"""
+    cache = set()
+    fifo = []
+    misses = 0
+    for vertex in np.asarray(triangles).ravel().tolist():
+        if not vertex in cache:
+            misses += 1
+            cache.add(vertex)
+            fifo.append(vertex)
+            if len(fifo) > cache_size:
+                cache.discard(fifo.pop(0))
+    return misses
+
+def cache_statistics(triangles, cache_size = 32) -> dict:
+    #"""ACMR, the transformed vertices per triangle, and ATVR, the transformed vertices per distinct vertex.
+    #1.0 is the best possible ATVR, the best ACMR depends on the mesh and is around 0.5 for regular grids."""
+    misses = cache_misses(triangles, cache_size)
+    triangle_count = len(triangles)
+    vertex_count = len(np.unique(triangles))
+    statistics = {}
+    statistics['misses'] = misses
+    statistics['triangles'] = triangle_count
+    statistics['vertices'] = vertex_count
+    statistics['acmr'] = misses / triangle_count if triangle_count else 0.0
+    statistics['atvr'] = misses / vertex_count if vertex_count else 0.0
+    return statistics
+
+def tipsify(triangles, vertex_count, cache_size = 32) -> np.ndarray:
+    #"""Reorder [triangles] for the post-transform vertex cache with Tipsify (Sander, Nehab and Barczak 2007).
+    #Triangles are emitted as fans around a vertex, and the next fan is picked among the vertices just used
+    #that will still be in the cache, falling back to recently used vertices and then to the lowest unfinished one."""
+    triangles = np.asarray(triangles, np.int64)
+    triangle_count = len(triangles)
+    if triangle_count == 0:
+        return triangles
+    
+    flat = triangles.ravel()
+    live = np.bincount(flat, minlength=vertex_count)
+    offsets = np.concatenate(([0], np.cumsum(live))).tolist()
+    #Triangles around every vertex, the triangles of vertex v are adjacency[offsets[v]:offsets[v + 1]]
+    adjacency = (np.argsort(flat, kind='stable') // 3).tolist()
+    
+    corners = triangles.tolist()
+    live = live.tolist()
+    timestamps = [0] * vertex_count
+    emitted = [False] * triangle_count
+    dead_end = []
+    output = []
+    time = cache_size + 1
+    cursor = 0
+    
+    def skip_dead_end():
+        nonlocal cursor
+        while dead_end:
+            vertex = dead_end.pop()
+            if live[vertex] > 0:
+                return vertex
+        while cursor < vertex_count:
+            cursor += 1
+            if live[cursor - 1] > 0:
+                return cursor - 1
+        return -1
+    
+    fan = skip_dead_end()
+    while fan >= 0:
+        candidates = []
+        for triangle in adjacency[offsets[fan]:offsets[fan + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = True
+            output.append(triangle)
+            for vertex in corners[triangle]:
+                dead_end.append(vertex)
+                candidates.append(vertex)
+                live[vertex] -= 1
+                if time - timestamps[vertex] > cache_size:
+                    timestamps[vertex] = time
+                    time += 1
+        
+        fan = -1
+        best = -1
+        for vertex in candidates:
+            if live[vertex] > 0:
+                priority = 0
+                if time - timestamps[vertex] + 2 * live[vertex] <= cache_size:
+                    priority = time - timestamps[vertex]
+                if priority > best:
+                    fan = vertex
+                    best = priority
+        if fan < 0:
+            fan = skip_dead_end()
+    
+    return triangles[output]
+
+def reorder_vertices(triangles, vertex_count) -> tuple:
+    #"""Number the vertices in the order [triangles] first use them, so vertex fetches walk the buffer forwards.
+    #Returns (order, triangles): the old index of every new vertex, unused vertices last, and the renumbered triangles."""
+    triangles = np.asarray(triangles, np.int64)
+    used, first = np.unique(triangles.ravel(), return_index=True)
+    used = used[np.argsort(first)]
+    unused = np.setdiff1d(np.arange(vertex_count), used, assume_unique=True)
+    order = np.concatenate((used, unused))
+    
+    remap = np.empty(vertex_count, np.int64)
+    remap[order] = np.arange(vertex_count)
+    return order, remap[triangles]
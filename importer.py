@@ -0,0 +1,658 @@
+import bpy
+import os
+import time
+import hashlib
+import threading
+
+import numpy as np
+from mathutils import Matrix
+
+from .cpmodel import read_cpmodel_data, triangulate_faces, inside_triangles, mesh_vertex_streams, blender_matrices, parent_order, QUIET
+from .batch import find_model_files, parse_files
+from .dds import extract_textures, texture_size
+from .bc import decode_textures
+from .geometry import weld_vertices
+from .profiler import Profiler, timed
+from .registry import image_registry, material_registry, get_material, texture_hash, existing_objects, model_path, MODEL_PATH, ELEMENT_NAME, MESH_HASH
+
+#---------------------------------------------------------------------------------------------------
+#---------------------------------------------------------------------------------------------------
+#---------------------------------------------------------------------------------------------------
+#---------------------------------------------------------------------------------------------------
+#---------------------------------------------------------------------------------------------------
+
+#Import options and their defaults, anything left out of an options dict falls back to these
+DEFAULT_OPTIONS = {
+    'swap_faces':False,         #Use the other face stream, some models store them the other way around
+    'verbosity':QUIET,          #Parser diagnostics level
+    'cache':None,               #ParseCache to read models through
+    'texture_mode':'FILES',     #'FILES' writes and opens .dds files, 'MEMORY' decodes BC textures into images
+    'pack_textures':False,      #Pack in memory textures into the .blend
+    'instance_meshes':False,    #Elements with identical geometry share one mesh datablock
+    'weld':False,               #Merge vertices with equal attributes before building the meshes
+    'weld_tolerance':0.0,       #Grid size vertex attributes are snapped to when welding, 0 only merges exact copies
+    'profile':'OFF',            #'REPORT' times every phase into the operator report, 'JSON' and 'TRACE' also write it next to the model
+    'update_existing':False,    #Update the objects an earlier import of the same file made instead of adding new ones
+}
+
+def import_options(options) -> dict:
+    return dict(DEFAULT_OPTIONS, **(options or {}))
+
+def weld_summary(statistics) -> str:
+    removed = statistics['vertices'] - statistics['welded_vertices']
+    percent = 100 * removed / statistics['vertices'] if statistics['vertices'] else 0
+    return "Welded {0} vertices down to {1} ({2:.1f}% fewer)".format(statistics['vertices'], statistics['welded_vertices'], percent)
+
+def model_name(filepath) -> str:
+    return os.path.splitext(os.path.basename(filepath))[0]
+
+def report_profile(self, profiler, mode, filepath):
+    #"""Report every phase of [profiler] and write it next to [filepath] for the 'JSON' and 'TRACE' [mode]s"""
+    for line in profiler.lines():
+        self.report({'INFO'}, line)
+    if mode == 'JSON':
+        profiler.write_json(os.path.splitext(filepath)[0] + '.profile.json')
+    elif mode == 'TRACE':
+        profiler.write_trace(os.path.splitext(filepath)[0] + '.trace.json')
+
+def load_model(filepath, options, profiler) -> dict:
+    if options['cache']:
+        return options['cache'].load(filepath, options['verbosity'], profiler)
+    return read_cpmodel_data(None, filepath, options['verbosity'], profiler)
+
+def dropped_summary(statistics) -> str:
+    return "Dropped {0} triangles pointing outside their mesh's vertices, try toggling Swap Faces".format(statistics['dropped_triangles'])
+
+def update_summary(statistics) -> str:
+    return "Updated {0} meshes, {1} unchanged, {2} new objects".format(statistics['updated'], statistics['unchanged'], statistics['added'])
+
+def finish_import(self, context, filepath, options, profiler, statistics):
+    if options['weld']:
+        self.report({'INFO'}, weld_summary(statistics))
+    if statistics['dropped_triangles'] > 0:
+        self.report({'WARNING'}, dropped_summary(statistics))
+    if options['update_existing']:
+        self.report({'INFO'}, update_summary(statistics))
+    
+    with profiler.phase('update view layer'):
+        context.view_layer.update()
+    
+    if profiler:
+        report_profile(self, profiler, options['profile'], filepath)
+
+def import_cpmodel(self, context, filepath, options = None):
+    options = import_options(options)
+    profiler = Profiler(options['profile'] != 'OFF')
+    
+    model = load_model(filepath, options, profiler)
+    statistics = create_model_from_data(model, options, profiler, model_name(filepath), filepath)
+    finish_import(self, context, filepath, options, profiler, statistics)
+    return {'FINISHED'}
+
+#The share of the progress bar every phase of a background import fills. The parse phase
+#also covers decoding the meshes, which is what its progress counts.
+JOB_PHASES = (('parse', 0.3), ('textures', 0.1), ('meshes', 0.45), ('objects', 0.15))
+
+class ImportJob:
+    #"""A single model imported without blocking Blender. The file is parsed and its meshes decoded on a background
+    #thread, then step() builds the Blender data a slice at a time from timer events on the main thread.
+    #cancel() stops both and removes every datablock made so far. With 'update_existing' the meshes
+    #already rebuilt in place stay rebuilt, their objects keep using them so they can't be removed."""
+    def __init__(self, filepath, options = None):
+        self.filepath = filepath
+        self.options = import_options(options)
+        self.profiler = Profiler(self.options['profile'] != 'OFF')
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.prepare, daemon=True)
+        
+        self.phase = 'parse'
+        self.done = 0
+        self.total = 0
+        
+        self.error = None
+        self.prepared = None
+        self.steps = None
+        self.created = []
+        self.statistics = None
+    
+    def start(self):
+        self.thread.start()
+    
+    def prepare(self):
+        #Runs on the background thread, nothing here may touch Blender data
+        try:
+            model = load_model(self.filepath, self.options, self.profiler)
+            objects = plan_objects(model, self.options)
+            #The images an earlier import made can't be looked up from here, every texture is decoded
+            with self.profiler.phase('prepare textures', len(model['textures'])):
+                texture_data = prepare_textures(model, self.options)
+            with self.profiler.phase('prepare meshes'):
+                prepared = prepare_meshes(model, objects, self.options, self.cancelled, self.progress)
+            self.prepared = (model, objects, prepared, texture_data)
+        except Exception as error:
+            self.error = error
+    
+    def progress(self, done, total):
+        self.done = done
+        self.total = total
+    
+    def step(self, budget = 0.05) -> bool:
+        #"""Build for about [budget] seconds. True once the import is finished.
+        #An error of the background thread is raised here once it has stopped."""
+        if self.steps == None:
+            if self.thread.is_alive():
+                return False
+            if not self.error == None:
+                raise self.error
+            model, objects, prepared, texture_data = self.prepared
+            self.steps = build_model(model, self.options, self.profiler, model_name(self.filepath), self.filepath, objects, prepared, self.created, texture_data)
+        
+        deadline = time.perf_counter() + budget
+        try:
+            while time.perf_counter() < deadline:
+                self.phase, self.done, self.total = next(self.steps)
+        except StopIteration as stop:
+            self.statistics = stop.value
+            return True
+        return False
+    
+    def fraction(self) -> float:
+        #"""How much of the whole import is done, every phase filling its share of JOB_PHASES"""
+        fraction = 0.0
+        for phase, share in JOB_PHASES:
+            if phase == self.phase:
+                return fraction + share * (self.done / self.total if self.total else 0.0)
+            fraction += share
+        return fraction
+    
+    def status(self) -> str:
+        return "Importing {0}: {1} {2}/{3}, Esc to cancel".format(os.path.basename(self.filepath), self.phase, self.done, self.total)
+    
+    def cancel(self):
+        #"""Stop the import and remove what it made. The background thread can't be interrupted inside the parse,
+        #it finishes that on its own and its result is dropped."""
+        self.cancelled.set()
+        if not self.steps == None:
+            self.steps.close()
+        remove_datablocks(self.created)
+        self.created = []
+    
+    def cancel_summary(self) -> str:
+        if self.options['update_existing'] and not self.steps == None:
+            return "Import cancelled, meshes already updated in place keep their new geometry"
+        return "Import cancelled"
+    
+    def finish(self, operator, context):
+        finish_import(operator, context, self.filepath, self.options, self.profiler, self.statistics)
+
+def removed(datablock) -> bool:
+    #"""Whether [datablock] was freed, by undo or loading another file while the import ran"""
+    try:
+        datablock.name
+    except ReferenceError:
+        return True
+    return False
+
+def remove_datablocks(datablocks):
+    #"""Remove the datablocks a cancelled import made, in one call so Blender sorts out the users between them"""
+    datablocks = [datablock for datablock in datablocks if not removed(datablock)]
+    if len(datablocks) > 0:
+        bpy.data.batch_remove(datablocks)
+
+def import_cpmodel_batch(self, context, path, pattern, workers = None, options = None):
+    #"""Import every model found at [path] (a directory or a glob). Files are parsed on a process pool and
+    #their Blender data is built here on the main thread as each one arrives. Files that fail are reported and skipped."""
+    options = import_options(options)
+    filepaths = find_model_files(path, pattern)
+    if len(filepaths) == 0:
+        self.report({'WARNING'}, "No model files found at {0}".format(path))
+        return {'CANCELLED'}
+    
+    profiler = Profiler(options['profile'] != 'OFF')
+    
+    imported = 0
+    totals = {'vertices':0, 'welded_vertices':0, 'dropped_triangles':0, 'updated':0, 'unchanged':0, 'added':0}
+    #Parsing runs in the workers, the main thread only sees the time spent waiting on them
+    for filepath, model, error in timed(parse_files(filepaths, workers, options['verbosity'], options['cache']), profiler, 'wait for parse'):
+        if not error == None:
+            self.report({'WARNING'}, "{0}: {1}".format(os.path.basename(filepath), error))
+            continue
+        
+        try:
+            statistics = create_model_from_data(model, options, profiler, model_name(filepath), filepath)
+        except Exception as error:
+            self.report({'WARNING'}, "{0}: {1}".format(os.path.basename(filepath), error))
+            continue
+        imported += 1
+        for key in totals:
+            totals[key] += statistics[key]
+    
+    #One update for the whole batch, every model was built without the scene seeing it
+    with profiler.phase('update view layer'):
+        context.view_layer.update()
+    
+    if options['weld']:
+        self.report({'INFO'}, weld_summary(totals))
+    if totals['dropped_triangles'] > 0:
+        self.report({'WARNING'}, dropped_summary(totals))
+    if options['update_existing']:
+        self.report({'INFO'}, update_summary(totals))
+    if profiler:
+        report_profile(self, profiler, options['profile'], os.path.join(os.path.dirname(filepaths[0]), 'batch'))
+    self.report({'INFO'}, "Imported {0} of {1} models".format(imported, len(filepaths)))
+    return {'FINISHED'}
+
+def build_mesh(object_mesh, parts):
+    #"""Fill an empty mesh with the decoded parts of one element using bulk foreach_set calls.
+    #Each part holds the positions, color attributes, (N, 3) triangles and material slot of one game mesh."""
+    vert_bases = np.cumsum([0] + [len(part['positions']) for part in parts])
+    
+    positions = np.concatenate([part['positions'] for part in parts]).astype(np.float32)
+    triangles = np.concatenate([part['triangles'] + vert_bases[i] for i, part in enumerate(parts)]).astype(np.int32)
+    material_indices = np.concatenate([np.full(len(part['triangles']), part['material_index'], np.int32) for part in parts])
+    
+    vert_count = len(positions)
+    face_count = len(triangles)
+    
+    object_mesh.vertices.add(vert_count)
+    object_mesh.vertices.foreach_set('co', positions.ravel())
+    
+    object_mesh.loops.add(face_count * 3)
+    object_mesh.loops.foreach_set('vertex_index', triangles.ravel())
+    
+    object_mesh.polygons.add(face_count)
+    object_mesh.polygons.foreach_set('loop_start', np.arange(0, face_count * 3, 3, dtype=np.int32))
+    if bpy.app.version < (4, 0, 0):
+        object_mesh.polygons.foreach_set('loop_total', np.full(face_count, 3, np.int32))
+    object_mesh.polygons.foreach_set('material_index', material_indices)
+    
+    #Vertex data beyond position and normal goes into color attributes, parts without a layer get zeros
+    for i in range(max(len(part['colors']) for part in parts)):
+        colors = np.concatenate([part['colors'][i] if i < len(part['colors']) else np.zeros((len(part['positions']), 4)) for part in parts]).astype(np.float32)
+        attribute = object_mesh.attributes.new('Vert_Data_' + str(i), 'FLOAT_COLOR', 'POINT')
+        attribute.data.foreach_set('color', colors.ravel())
+    
+    #The first color attribute carries both uv sets: (x, 1-z) and (y, 1-w)
+    uv_1 = np.zeros((vert_count, 2), np.float32)
+    uv_2 = np.zeros((vert_count, 2), np.float32)
+    for i, part in enumerate(parts):
+        if len(part['colors']) > 0:
+            uv = part['colors'][0].astype(np.float32)
+            uv_1[vert_bases[i]:vert_bases[i+1]] = np.stack((uv[:, 0], 1 - uv[:, 2]), axis=1)
+            uv_2[vert_bases[i]:vert_bases[i+1]] = np.stack((uv[:, 1], 1 - uv[:, 3]), axis=1)
+    
+    loop_verts = triangles.ravel()
+    object_mesh.uv_layers.new(name='UV1').data.foreach_set('uv', uv_1[loop_verts].ravel())
+    object_mesh.uv_layers.new(name='UV2').data.foreach_set('uv', uv_2[loop_verts].ravel())
+    
+    object_mesh.validate()
+    object_mesh.update(calc_edges=True)
+
+def object_matrices(matrices) -> list:
+    #"""The stored [matrices] as Matrix objects for matrix_basis. A nested list would be copied into Blender's
+    #column-major storage as it is, transposing the matrix and moving the position into the bottom row."""
+    return [Matrix(matrix) for matrix in blender_matrices(matrices).tolist()]
+
+def create_image(texture, pixels, pack):
+    #"""Create an image from decoded [pixels] without going through a file"""
+    width, height = texture_size(texture)
+    image = bpy.data.images.new(texture['name'], width, height, alpha=True)
+    image.pixels.foreach_set(pixels.ravel())
+    if pack:
+        image.pack()
+    return image
+
+def geometry_key(parts) -> tuple:
+    #"""What the mesh of an element is built from. Elements with equal keys have identical meshes."""
+    return tuple((part['definition'], part['vertex_stream'], part['vert_start'], part['vert_end'], part['vert_offset'],
+                  part['face_stream'], part['face_type'], part['face_start'], part['face_count'], part['material']) for part in parts)
+
+def mesh_hash(model, object, options) -> str:
+    #"""Hash of what the mesh of [object] is made of: the vertex data and faces its parts use, how they are read, its
+    #material slots and the options changing the result. Unlike geometry_key it doesn't change when the data only moves in the file."""
+    digest = hashlib.blake2b(digest_size=16)
+    layout = [(part['vert_offset'], part['face_type'], part['color_count'], part['material_index']) for part in object['parts']]
+    digest.update(repr((layout, object['materials'], options['weld'], options['weld_tolerance'])).encode())
+    for part in object['parts']:
+        attributes = model['vertex_streams'][part['vertex_stream']]['attributes']
+        for attribute in attributes[:1] + attributes[2:2 + part['color_count']]:
+            digest.update(np.ascontiguousarray(attribute[part['vert_start']:part['vert_end']]))
+        faces = model['face_streams'][part['face_stream']]['faces']
+        digest.update(np.ascontiguousarray(faces[part['face_start']:part['face_start'] + part['face_count']]))
+    return digest.hexdigest()
+
+def rebuild_mesh(object_mesh, parts, materials):
+    #"""Replace the geometry and materials of an existing mesh in place. The datablock stays, so the objects and modifiers using it keep working."""
+    object_mesh.clear_geometry()
+    build_mesh(object_mesh, parts)
+    object_mesh.materials.clear()
+    [object_mesh.materials.append(mat) for mat in materials]
+
+def mesh_part(model, part, weld_tolerance = None) -> dict:
+    #"""Decode the vertices and triangles of [part] for build_mesh, welding its vertices unless [weld_tolerance] is None"""
+    vert_stream = model['vertex_streams'][part['vertex_stream']]
+    face_stream = model['face_streams'][part['face_stream']]
+    
+    attributes = [attribute[part['vert_start']:part['vert_end']] for attribute in vert_stream['attributes']]
+    
+    positions = attributes[0][:, 0:3]
+    colors = attributes[2:2 + part['color_count']]
+    triangles = triangulate_faces(face_stream['faces'], part['face_type'], part['face_start'], part['face_count'], part['vert_offset'])
+    
+    #Blender can't be given triangles pointing outside the part's vertices
+    inside = inside_triangles(triangles, len(positions))
+    
+    decoded = {}
+    decoded['source_vertex_count'] = len(positions)
+    decoded['dropped_triangles'] = int(len(triangles) - inside.sum())
+    triangles = triangles[inside]
+    if not weld_tolerance == None:
+        positions, colors, triangles = weld_vertices(positions, colors, triangles, weld_tolerance)
+    decoded['positions'] = positions
+    decoded['colors'] = colors
+    decoded['triangles'] = triangles
+    decoded['material_index'] = part['material_index']
+    return decoded
+
+def plan_objects(model, options) -> list:
+    #"""The parts the mesh of every element is made of, worked out for the whole mesh table at once. Elements without
+    #meshes are None. Material slots are listed by FX name. Touches no Blender data, so it can run off the main thread."""
+    objects = [None] * len(model['elements'])
+    
+    meshes = model['meshes'].array
+    data1 = model['meshes'].first('data1')
+    vert_streams, vert_starts, attribute_counts = mesh_vertex_streams(model)
+    
+    if options['swap_faces'] == True: 
+        face_streams = 1 - meshes['face_stream_index']
+    else:
+        face_streams = meshes['face_stream_index']
+    
+    for definition_index, face_type, material, object_index, vert_stream_index, face_stream_index, vert_start, attribute_count, vert_offset, vert_count, face_start, face_count in zip(
+            meshes['definition'].tolist(), meshes['face_type'].tolist(), meshes['material_index'].tolist(), meshes['object_index'].tolist(),
+            vert_streams.tolist(), face_streams.tolist(), vert_starts.tolist(), attribute_counts.tolist(), data1['vert_offset'].tolist(),
+            data1['vert_count'].tolist(), data1['face_offset'].tolist(), data1['face_count'].tolist()):
+        
+        if objects[object_index] == None:
+            objects[object_index] = {'parts':[], 'materials':[]}
+        
+        object = objects[object_index]
+        
+        desired_material = fx_name(model['fx_files'][material])
+        if not desired_material in object['materials']:
+            object['materials'].append(desired_material)
+            material_index = len(object['materials']) - 1
+        else:
+            material_index = object['materials'].index(desired_material)
+        
+        #Where the part's geometry comes from, decoded by mesh_part once the element's mesh is built
+        part = {}
+        part['definition'] = definition_index
+        part['vertex_stream'] = vert_stream_index
+        part['vert_start'] = vert_start
+        part['vert_end'] = vert_start + vert_count
+        part['vert_offset'] = vert_offset
+        part['face_stream'] = face_stream_index
+        part['face_type'] = face_type
+        part['face_start'] = face_start
+        part['face_count'] = face_count
+        part['color_count'] = attribute_count - 2
+        part['material_index'] = material_index
+        part['material'] = material
+        object['parts'].append(part)
+    return objects
+
+def fx_name(fx_file) -> str:
+    return fx_file.split('.')[0]
+
+def prepare_meshes(model, objects, options, cancelled = None, progress = None) -> dict:
+    #"""Decode the parts of every distinct element mesh up front, by geometry_key. Like plan_objects this only
+    #uses NumPy, so a background thread can do it while Blender stays responsive. Stops early once the
+    #[cancelled] event is set, [progress] is called with the number of meshes done and the total."""
+    weld_tolerance = options['weld_tolerance'] if options['weld'] else None
+    keys = {}
+    for object in objects:
+        if not object == None:
+            keys.setdefault(geometry_key(object['parts']), object['parts'])
+    
+    prepared = {}
+    for key, parts in keys.items():
+        if cancelled and cancelled.is_set():
+            break
+        prepared[key] = [mesh_part(model, part, weld_tolerance) for part in parts]
+        if progress:
+            progress(len(prepared), len(keys))
+    return prepared
+
+def prepare_textures(model, options, images = None) -> tuple:
+    #"""The hash of every texture and, with the 'MEMORY' texture mode, the decoded pixels of every distinct one
+    #by hash, None for formats that can't be decoded. Textures already in [images] aren't decoded.
+    #Nothing here touches Blender data, so it can run on the background thread."""
+    hashes = [texture_hash(tx) for tx in model['textures']]
+    distinct = {key:tx for tx, key in zip(model['textures'], hashes) if images == None or images.get(key) is None}
+    pixels = {}
+    if options['texture_mode'] == 'MEMORY':
+        pixels = dict(zip(distinct.keys(), decode_textures(list(distinct.values()))))
+    return hashes, pixels
+
+def create_model_from_data(model, options = None, profiler = None, name = None, filepath = None):
+    #"""Build the Blender data of a decoded model. With the 'MEMORY' texture mode BC compressed textures are
+    #decoded straight into images, only other formats still go through .dds files next to the saved .blend.
+    #The objects go into a new collection called [name], the first submodel's name by default, inside the active one.
+    #Objects are tagged with the model's [filepath] when given. With 'update_existing' the objects an earlier import
+    #of it tagged are matched by element name and only meshes whose content hash changed are rebuilt, in place.
+    #Returns the vertex counts of the built meshes before and after welding, the triangles dropped for pointing
+    #outside their vertices and how many meshes were updated or unchanged and objects added. A [profiler] times every phase."""
+    steps = build_model(model, options, profiler, name, filepath)
+    try:
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        return stop.value
+
+def build_model(model, options = None, profiler = None, name = None, filepath = None, objects = None, prepared = None, created = None, texture_data = None):
+    #"""create_model_from_data as a generator yielding (phase, done, total) after every unit of work, so the
+    #build can be spread over timer events. [objects], [prepared] meshes and [texture_data] from plan_objects,
+    #prepare_meshes and prepare_textures are used when given, anything else is worked out as it is needed.
+    #Every datablock made is added to [created], meshes updated in place and the copies given to updated objects
+    #aren't, so they keep their new geometry if the build is abandoned. The time between yields is left out of
+    #the [profiler]'s phases."""
+    options = import_options(options)
+    profiler = profiler or Profiler(False)
+    created = [] if created == None else created
+    
+    directory = bpy.path.abspath("//")
+    saved = directory != ''
+    
+    #Textures and materials already made by an earlier import are reused instead of loaded again
+    with profiler.phase('textures', len(model['textures'])) as phase:
+        images = image_registry()
+        if texture_data == None:
+            texture_data = prepare_textures(model, options, images)
+        hashes, pixels = texture_data
+        missing = {key:tx for tx, key in zip(model['textures'], hashes) if images.get(key) is None}
+        phase.count(bytes=sum(memoryview(tx['data']).nbytes for tx in missing.values()))
+        
+        #The .dds files are written together on extract_textures' threads, only loading them is left per image
+        file_textures = [key for key, tx in missing.items() if pixels.get(key) is None]
+        paths = {}
+        rewritten = {}
+        if not saved:
+            pass#self.report({'WARNING'}, "The blend file is not saved. Textures will not be downloaded.")
+        else:
+            filepaths, written = extract_textures([missing[key] for key in file_textures], directory)
+            paths = dict(zip(file_textures, filepaths))
+            rewritten = dict(zip(file_textures, written))
+        
+        for i, (key, tx) in enumerate(missing.items()):
+            tx_pixels = pixels.get(key)
+            if not tx_pixels is None:
+                created.append(images.add(key, create_image(tx, tx_pixels, options['pack_textures'])))
+            elif key in paths:
+                image = bpy.data.images.load(paths[key], check_existing=True)
+                #An image nothing uses yet was loaded just now
+                if image.users == 0:
+                    created.append(image)
+                #An image already loaded from a file that was written again still holds the pixels it had before
+                if rewritten[key]:
+                    image.reload()
+                images.add(key, image)
+            with profiler.paused():
+                yield 'textures', i + 1, len(missing)
+    
+    with profiler.phase('materials', len(model['fx_files'])):
+        materials_registry = material_registry()
+        materials = {}
+        for fx_file in model['fx_files']:
+            fx = fx_name(fx_file)
+            count = len(bpy.data.materials)
+            materials[fx] = get_material(materials_registry, fx)
+            if len(bpy.data.materials) > count:
+                created.append(materials[fx])
+    
+    if objects == None:
+        objects = plan_objects(model, options)
+    if prepared == None:
+        prepared = {}
+    
+    #Elements made of the same parts share one mesh datablock when instancing
+    shared_meshes = {}
+    
+    #Elements with equal geometry keys have equal content, their hash is only worked out once and only where it is stored or compared
+    mesh_hashes = {}
+    def content_hash(key, object):
+        if not key in mesh_hashes:
+            mesh_hashes[key] = mesh_hash(model, object, options)
+        return mesh_hashes[key]
+    
+    weld_tolerance = options['weld_tolerance'] if options['weld'] else None
+    statistics = {'vertices':0, 'welded_vertices':0, 'dropped_triangles':0, 'updated':0, 'unchanged':0, 'added':0}
+    
+    elements = model['elements']
+    names = elements.column_names()
+    
+    #The objects of an earlier import that are still elements of the model, a mesh element only matches a mesh object
+    matches = [None] * len(objects)
+    if options['update_existing'] and not filepath == None:
+        existing = existing_objects(filepath)
+        for i, object in enumerate(objects):
+            candidates = existing.get(names[i], [])
+            if len(candidates) > 0 and (candidates[0].type == 'MESH') == (not object == None):
+                matches[i] = candidates.pop(0)
+    
+    object_meshes = [None] * len(objects)
+    #Matched meshes by name and content hash once rebuilt or found unchanged. Several matched objects share a mesh
+    #when instancing, an element whose content no longer matches the others' gets a copy of its own.
+    checked_meshes = {}
+    claimed_meshes = set()
+    with profiler.phase('build meshes') as phase:
+        for i, object in enumerate(objects):
+            if object == None:
+                continue
+            key = geometry_key(object['parts'])
+            match = matches[i]
+            if not match == None:
+                content = content_hash(key, object)
+                check = (match.data.name, content)
+                if not check in checked_meshes:
+                    object_mesh = match.data
+                    if object_mesh.name in claimed_meshes:
+                        object_mesh = object_mesh.copy()
+                    claimed_meshes.add(object_mesh.name)
+                    if object_mesh.get(MESH_HASH) == content:
+                        statistics['unchanged'] += 1
+                    else:
+                        parts = prepared.get(key) or [mesh_part(model, part, weld_tolerance) for part in object['parts']]
+                        statistics['vertices'] += sum(part['source_vertex_count'] for part in parts)
+                        statistics['welded_vertices'] += sum(len(part['positions']) for part in parts)
+                        statistics['dropped_triangles'] += sum(part['dropped_triangles'] for part in parts)
+                        rebuild_mesh(object_mesh, parts, [materials[fx] for fx in object['materials']])
+                        object_mesh[MESH_HASH] = content
+                        statistics['updated'] += 1
+                        phase.count(sum(len(part['positions']) for part in parts))
+                    checked_meshes[check] = object_mesh
+                object_mesh = checked_meshes[check]
+                if not match.data == object_mesh:
+                    match.data = object_mesh
+                object_meshes[i] = object_mesh
+                with profiler.paused():
+                    yield 'meshes', i + 1, len(objects)
+                continue
+            
+            object_mesh = shared_meshes.get(key) if options['instance_meshes'] else None
+            if object_mesh == None:
+                object_mesh = bpy.data.meshes.new(names[i])
+                created.append(object_mesh)
+                parts = prepared.get(key) or [mesh_part(model, part, weld_tolerance) for part in object['parts']]
+                statistics['vertices'] += sum(part['source_vertex_count'] for part in parts)
+                statistics['welded_vertices'] += sum(len(part['positions']) for part in parts)
+                statistics['dropped_triangles'] += sum(part['dropped_triangles'] for part in parts)
+                build_mesh(object_mesh, parts)
+                [object_mesh.materials.append(materials[fx]) for fx in object['materials']]
+                if not filepath == None:
+                    object_mesh[MESH_HASH] = content_hash(key, object)
+                shared_meshes[key] = object_mesh
+                phase.count(sum(len(part['positions']) for part in parts))
+            object_meshes[i] = object_mesh
+            with profiler.paused():
+                yield 'meshes', i + 1, len(objects)
+    
+    matrices = object_matrices(elements.column('matrix'))
+    order, parents = parent_order(elements.column('parent'))
+    parents = parents.tolist()
+    
+    if name == None:
+        name = model['models'][0]['name'] if len(model['models']) > 0 else 'CPModel'
+    
+    #New elements of an updated model join the collection its earlier objects are in
+    collection = None
+    for match in matches:
+        if not match == None and len(match.users_collection) > 0:
+            collection = match.users_collection[0]
+            break
+    
+    #Only the new objects are touched, parents are created first so each child is parented as it is made.
+    #Element matrices are relative to their parent, so the parent inverse stays the identity.
+    #Matched objects are left as they are, with their transform, parent and modifiers.
+    path = model_path(filepath) if not filepath == None else None
+    with profiler.phase('link objects', len(objects)):
+        new_collection = collection == None
+        if new_collection:
+            collection = bpy.data.collections.new(name)
+            created.append(collection)
+        linked_objects = [None] * len(object_meshes)
+        for done, i in enumerate(order.tolist()):
+            if not matches[i] == None:
+                linked_objects[i] = matches[i]
+                with profiler.paused():
+                    yield 'objects', done + 1, len(order)
+                continue
+            
+            object_mesh = object_meshes[i]
+            if not object_mesh == None:
+                linked_object = bpy.data.objects.new(names[i], object_mesh)
+            else:
+                linked_object = bpy.data.objects.new(names[i], None)
+                linked_object.empty_display_size = 0.2
+                linked_object.empty_display_type = 'SPHERE'
+            created.append(linked_object)
+            if not filepath == None:
+                linked_object[MODEL_PATH] = path
+                linked_object[ELEMENT_NAME] = names[i]
+            statistics['added'] += 1
+            
+            linked_object.matrix_basis = matrices[i]
+            
+            if parents[i] >= 0:
+                linked_object.parent = linked_objects[parents[i]]
+            
+            collection.objects.link(linked_object)
+            linked_objects[i] = linked_object
+            with profiler.paused():
+                yield 'objects', done + 1, len(order)
+        
+        #The collection joins the scene last, so linking the objects above doesn't update it each time
+        if new_collection:
+            bpy.context.collection.children.link(collection)
+    
+    return statistics
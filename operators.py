@@ -0,0 +1,315 @@
+import bpy
+
+from bpy_extras.io_utils import ImportHelper, ExportHelper
+from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty, FloatProperty
+from bpy.types import Operator, AddonPreferences
+
+#The importer, the parser and NumPy are only imported once an operator runs,
+#so registering the add-on costs no more than defining these classes.
+
+def parse_verbosity(verbosity) -> int:
+    from .cpmodel import QUIET, REPORT
+    return REPORT if verbosity == 'REPORT' else QUIET
+
+def parse_cache(context, use_cache):
+    #"""The parse cache configured in the add-on preferences, or None when [use_cache] is off"""
+    if not use_cache:
+        return None
+    from .cache import ParseCache, DEFAULT_CACHE_DIRECTORY
+    preferences = context.preferences.addons[__package__].preferences
+    directory = bpy.path.abspath(preferences.cache_directory) or DEFAULT_CACHE_DIRECTORY
+    return ParseCache(directory, preferences.cache_size * 1024 * 1024)
+
+class CPModelPreferences(AddonPreferences):
+    bl_idname = __package__
+
+    cache_directory: StringProperty(
+        name="Cache Directory",
+        description="Where parsed models are cached. Leave empty to use the system temporary directory",
+        subtype='DIR_PATH',
+        default="",
+    )
+
+    cache_size: IntProperty(
+        name="Cache Size (MB)",
+        description="The least recently used parses are removed once the cache grows past this size",
+        default=2048,
+        min=0,
+    )
+
+    def draw(self, context):
+        self.layout.prop(self, "cache_directory")
+        self.layout.prop(self, "cache_size")
+        self.layout.operator(ClearCPModelCache.bl_idname)
+
+class ImportOptions:
+    #Properties shared by the import operators
+
+    swap_faces: BoolProperty(
+        name="Swap Faces",
+        description="Some models have faces stored strangely. If the import doesent work the first time, try this.",
+        default=False,
+    )
+
+    verbosity: EnumProperty(
+        name="Diagnostics",
+        description="How much information about the parsed files to write out",
+        items=(
+            ('QUIET', "Quiet", "Don't write any diagnostics"),
+            ('REPORT', "JSON Report", "Write the unknown fields, offsets and section lengths to a .report.json file next to each model"),
+        ),
+        default='QUIET',
+    )
+
+    use_cache: BoolProperty(
+        name="Use Cache",
+        description="Reuse the parse of unchanged files from earlier imports. Turn off to always parse the files again",
+        default=True,
+    )
+
+    texture_mode: EnumProperty(
+        name="Textures",
+        description="How textures are brought into Blender",
+        items=(
+            ('FILES', "DDS Files", "Write textures as .dds files next to the saved .blend and open them. Nothing is loaded if the .blend isn't saved"),
+            ('MEMORY', "In Memory", "Decode DXT compressed textures straight into images, the .blend doesn't need to be saved"),
+        ),
+        default='FILES',
+    )
+
+    pack_textures: BoolProperty(
+        name="Pack Textures",
+        description="Pack in memory textures into the .blend",
+        default=False,
+    )
+
+    instance_meshes: BoolProperty(
+        name="Instance Meshes",
+        description="Elements built from the same vertices, faces and materials share one mesh instead of each getting a copy",
+        default=False,
+    )
+
+    weld: BoolProperty(
+        name="Weld Vertices",
+        description="Merge vertices with the same position and vertex data, the game splits its meshes into many duplicates",
+        default=False,
+    )
+
+    weld_tolerance: FloatProperty(
+        name="Weld Tolerance",
+        description="Vertex values are snapped to a grid of this size before merging, 0 only merges exact copies",
+        default=0.0,
+        min=0.0,
+        precision=6,
+    )
+
+    profile: EnumProperty(
+        name="Profile",
+        description="Time every parse and Blender phase of the import",
+        items=(
+            ('OFF', "Off", "Don't time the import"),
+            ('REPORT', "Report", "Report the time and throughput of every phase"),
+            ('JSON', "JSON", "Also write the phases to a .profile.json file next to the model"),
+            ('TRACE', "Chrome Trace", "Also write the phases to a .trace.json file next to the model, for chrome://tracing or Perfetto"),
+        ),
+        default='OFF',
+    )
+
+    update_existing: BoolProperty(
+        name="Update Existing",
+        description="Update the objects an earlier import of the same file made. Only meshes whose content changed are rebuilt, other objects and their modifiers and edits are left as they are",
+        default=False,
+    )
+
+    def import_options(self, context) -> dict:
+        options = {}
+        options['swap_faces'] = self.swap_faces
+        options['verbosity'] = parse_verbosity(self.verbosity)
+        options['cache'] = parse_cache(context, self.use_cache)
+        options['texture_mode'] = self.texture_mode
+        options['pack_textures'] = self.pack_textures
+        options['instance_meshes'] = self.instance_meshes
+        options['weld'] = self.weld
+        options['weld_tolerance'] = self.weld_tolerance
+        options['profile'] = self.profile
+        options['update_existing'] = self.update_existing
+        return options
+
+#Ctrl shortcuts for undo, redo, new and open, which free the datablocks a background import is building.
+#They are held back while it runs, undoing from the menus is still possible and is caught by ImportJob.cancel.
+HELD_SHORTCUTS = {'Z', 'Y', 'N', 'O'}
+
+class ImportCPModelData(Operator, ImportHelper, ImportOptions):
+    """This appears in the tooltip of the operator and in the generated docs"""
+    bl_idname = "import_cpmodel.data"
+    bl_label = "Import CPModel"
+
+    # ImportHelper mixin class uses this
+    filename_ext = ".model"
+
+    filter_glob: StringProperty(
+        default="*.model",
+        options={'HIDDEN'},
+        maxlen=255,  # Max internal buffer length, longer would be clamped.
+    )
+
+    background: BoolProperty(
+        name="Background",
+        description="Parse on a background thread and build the scene a little at a time, showing the progress. Press Esc to cancel. Cancelling an Update Existing import keeps the meshes already updated",
+        default=False,
+    )
+
+    def execute(self, context):
+        if self.background:
+            return self.start_job(context)
+        from .importer import import_cpmodel
+        return import_cpmodel(self, context, self.filepath, self.import_options(context))
+
+    def start_job(self, context):
+        from .importer import ImportJob
+        self._job = ImportJob(self.filepath, self.import_options(context))
+        self._job.start()
+        
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(0.05, window=context.window)
+        window_manager.modal_handler_add(self)
+        window_manager.progress_begin(0, 100)
+        return {'RUNNING_MODAL'}
+
+    def end_job(self, context):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self._timer)
+        window_manager.progress_end()
+        context.workspace.status_text_set(None)
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            self._job.cancel()
+            self.end_job(context)
+            self.report({'WARNING'}, self._job.cancel_summary())
+            return {'CANCELLED'}
+        
+        if event.type in HELD_SHORTCUTS and (event.ctrl or event.oskey):
+            return {'RUNNING_MODAL'}
+        
+        if not event.type == 'TIMER':
+            return {'PASS_THROUGH'}
+        
+        try:
+            finished = self._job.step()
+        except Exception as error:
+            self._job.cancel()
+            self.end_job(context)
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        
+        if finished:
+            self.end_job(context)
+            self._job.finish(self, context)
+            return {'FINISHED'}
+        
+        context.window_manager.progress_update(int(self._job.fraction() * 100))
+        context.workspace.status_text_set(self._job.status())
+        return {'RUNNING_MODAL'}
+
+class ImportCPModelBatch(Operator, ImportOptions):
+    """Import every CPModel in a directory, parsing the files in parallel"""
+    bl_idname = "import_cpmodel.batch"
+    bl_label = "Import CPModel Directory"
+
+    directory: StringProperty(
+        name="Directory",
+        subtype='DIR_PATH',
+    )
+
+    pattern: StringProperty(
+        name="Pattern",
+        description="Files to import inside the directory. Use ** to include subdirectories",
+        default="*.model",
+    )
+
+    workers: IntProperty(
+        name="Workers",
+        description="Number of processes parsing files at once, 0 uses every core",
+        default=0,
+        min=0,
+    )
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        from .importer import import_cpmodel_batch
+        return import_cpmodel_batch(self, context, self.directory, self.pattern, self.workers or None, self.import_options(context))
+
+class ExportCPModelData(Operator, ExportHelper):
+    """Write the selected meshes and empties as a CPModel"""
+    bl_idname = "export_cpmodel.data"
+    bl_label = "Export CPModel"
+
+    filename_ext = ".model"
+
+    filter_glob: StringProperty(
+        default="*.model",
+        options={'HIDDEN'},
+        maxlen=255,
+    )
+
+    use_selection: BoolProperty(
+        name="Selected Only",
+        description="Only export the selected objects, otherwise every mesh and empty in the scene",
+        default=True,
+    )
+
+    apply_modifiers: BoolProperty(
+        name="Apply Modifiers",
+        description="Export meshes with their modifiers applied",
+        default=True,
+    )
+
+    def execute(self, context):
+        from .exporter import export_cpmodel
+        options = {}
+        options['use_selection'] = self.use_selection
+        options['apply_modifiers'] = self.apply_modifiers
+        return export_cpmodel(self, context, self.filepath, options)
+
+class ClearCPModelCache(Operator):
+    """Delete every cached CPModel parse"""
+    bl_idname = "import_cpmodel.clear_cache"
+    bl_label = "Clear CPModel Cache"
+
+    def execute(self, context):
+        parse_cache(context, True).clear()
+        self.report({'INFO'}, "Cleared the CPModel cache")
+        return {'FINISHED'}
+
+def menu_func_import(self, context):
+    self.layout.operator(ImportCPModelData.bl_idname, text="Import CPModel (.model)")
+    self.layout.operator(ImportCPModelBatch.bl_idname, text="Import CPModel Directory (.model)")
+
+def menu_func_export(self, context):
+    self.layout.operator(ExportCPModelData.bl_idname, text="CPModel (.model)")
+
+
+classes = (
+    CPModelPreferences,
+    ImportCPModelData,
+    ImportCPModelBatch,
+    ExportCPModelData,
+    ClearCPModelCache,
+)
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    #bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
+    bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
+
+
+def unregister():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+    bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
+    bpy.types.TOPBAR_MT_file_export.remove(menu_func_export)
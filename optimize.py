@@ -0,0 +1,107 @@
+import numpy as np
+
+from .cpmodel import LazyCPModel, triangulate_faces, inside_triangles, mesh_vertex_streams
+from .geometry import tipsify, reorder_vertices, cache_statistics
+
+#Rebuilds the face and vertex streams of a parsed model so every mesh draws with fewer vertex shader runs.
+#The result is a model dict for writer.write_cpmodel.
+
+DEFAULT_CACHE_SIZE = 32
+
+def optimize_mesh(model, mesh, vertex_stream, vert_start, cache_size = DEFAULT_CACHE_SIZE) -> dict:
+    #"""Reorder the triangles of [mesh], whose vertices start at [vert_start] in [vertex_stream], with Tipsify and its vertices by first use.
+    #Returns its attributes and triangle list in the new order with the cache statistics before and after. Triangles
+    #pointing outside the mesh's vertices are dropped, as the importer does, and counted."""
+    stream = model['vertex_streams'][vertex_stream]
+    data1 = mesh['data1'][0]
+    vert_count = data1['vert_count']
+    
+    triangles = triangulate_faces(model['face_streams'][mesh['face_stream_index']]['faces'], mesh['face_type'],
+                                  data1['face_offset'], data1['face_count'], data1['vert_offset'])
+    inside = inside_triangles(triangles, vert_count)
+    dropped = int(len(triangles) - inside.sum())
+    triangles = triangles[inside]
+    
+    optimized = tipsify(triangles, vert_count, cache_size)
+    order, optimized = reorder_vertices(optimized, vert_count)
+    
+    result = {}
+    result['attributes'] = [attribute[vert_start:vert_start + vert_count][order] for attribute in stream['attributes']]
+    result['triangles'] = optimized
+    result['before'] = cache_statistics(triangles, cache_size)
+    result['after'] = cache_statistics(optimized, cache_size)
+    result['dropped_triangles'] = dropped
+    return result
+
+def combine_statistics(statistics) -> dict:
+    misses = sum(item['misses'] for item in statistics)
+    triangles = sum(item['triangles'] for item in statistics)
+    vertices = sum(item['vertices'] for item in statistics)
+    return {'misses':misses, 'triangles':triangles, 'vertices':vertices,
+            'acmr':misses / triangles if triangles else 0.0, 'atvr':misses / vertices if vertices else 0.0}
+
+def optimize_model(model, cache_size = DEFAULT_CACHE_SIZE) -> tuple:
+    #"""Rebuild the streams of a fully loaded [model] with every mesh optimized for a [cache_size] entry vertex cache.
+    #Meshes become triangle lists in their original face stream and get their own copy of their vertices.
+    #Returns (model, statistics) with the per mesh and overall ACMR and ATVR before and after, and the triangles
+    #every mesh dropped for pointing outside its vertices."""
+    streams, starts, attribute_counts = mesh_vertex_streams(model)
+    
+    vertex_streams = [{'definition':stream['definition'], 'bytes':stream['bytes'], 'attributes':[[] for item in stream['definition']], 'count':0}
+                      for stream in model['vertex_streams']]
+    face_streams = [{'faces':[], 'count':0} for stream in model['face_streams']]
+    
+    meshes = []
+    statistics = {'meshes':[]}
+    for mesh, vertex_stream, vert_start in zip(model['meshes'], streams.tolist(), starts.tolist()):
+        result = optimize_mesh(model, mesh, vertex_stream, vert_start, cache_size)
+        vs = vertex_streams[vertex_stream]
+        fs = face_streams[mesh['face_stream_index']]
+        
+        optimized = dict(mesh)
+        optimized['face_type'] = 0
+        optimized['data1'] = [{'face_offset':fs['count'], 'face_count':result['triangles'].size, 'vert_offset':0, 'vert_count':len(result['attributes'][0])}]
+        optimized['data2'] = [dict(mesh['data2'][0], vOffset=vs['count'] * vs['bytes'])]
+        meshes.append(optimized)
+        
+        for attributes, attribute in zip(vs['attributes'], result['attributes']):
+            attributes.append(attribute)
+        vs['count'] += len(result['attributes'][0])
+        fs['faces'].append(result['triangles'].ravel().astype(np.uint16))
+        fs['count'] += result['triangles'].size
+        
+        statistics['meshes'].append({'index':mesh['index'], 'before':result['before'], 'after':result['after'], 'dropped_triangles':result['dropped_triangles']})
+    
+    for i, vs in enumerate(vertex_streams):
+        vs['attributes'] = [np.concatenate(attributes) if attributes else model['vertex_streams'][i]['attributes'][j][:0]
+                            for j, attributes in enumerate(vs['attributes'])]
+    for fs in face_streams:
+        fs['faces'] = np.concatenate(fs['faces']) if fs['faces'] else np.zeros(0, np.uint16)
+    
+    statistics['before'] = combine_statistics([item['before'] for item in statistics['meshes']])
+    statistics['after'] = combine_statistics([item['after'] for item in statistics['meshes']])
+    
+    optimized_model = dict(model)
+    optimized_model['vertex_streams'] = vertex_streams
+    optimized_model['face_streams'] = face_streams
+    optimized_model['meshes'] = meshes
+    return optimized_model, statistics
+
+
+if __name__ == "__main__":
+    #Standalone use: python -m BlurImportExport.optimize [--cache-size 32] [--output optimized.model] file
+    import argparse
+    from .writer import write_cpmodel
+    
+    parser = argparse.ArgumentParser(description="Optimize the face and vertex order of a CPModel for the vertex cache and print the ACMR and ATVR before and after")
+    parser.add_argument('file')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE)
+    parser.add_argument('--output', help="write the optimized model here")
+    args = parser.parse_args()
+    
+    model, statistics = optimize_model(LazyCPModel(args.file).load(), args.cache_size)
+    for item in statistics['meshes'] + [dict(statistics, index='all')]:
+        print('mesh {0}: ACMR {1:.3f} -> {2:.3f}, ATVR {3:.3f} -> {4:.3f}'.format(
+            item['index'], item['before']['acmr'], item['after']['acmr'], item['before']['atvr'], item['after']['atvr']))
+    if args.output:
+        write_cpmodel(args.output, model)
@@ -0,0 +1,122 @@
+import json
+import time
+from contextlib import contextmanager
+
+#Wall clock timing of the import phases. A phase covers a span of time and optionally the bytes and items
+#it went through, so throughput can be reported. Phases with the same name are summed in the summary.
+
+class Profiler:
+    #"""Collects timed phases. A disabled profiler is falsy and records nothing, so callers can
+    #test it the same way the parser tests its report."""
+    def __init__(self, enabled = True):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.phases = []
+        self.current = None
+    
+    def __bool__(self):
+        return self.enabled
+    
+    def begin(self, name, position = None):
+        #"""End the current phase and start [name]. With a [position] the phase's bytes are the
+        #distance to the position it ends at."""
+        if not self.enabled:
+            return
+        self.end(position)
+        self.current = {'name':name, 'start':time.perf_counter() - self.origin, 'bytes':0, 'items':0, 'position':position}
+    
+    def count(self, items = 0, bytes = 0):
+        #"""Add [items] and [bytes] to the current phase"""
+        if self.current:
+            self.current['items'] += items
+            self.current['bytes'] += bytes
+    
+    def end(self, position = None):
+        if not self.current:
+            return
+        phase = self.current
+        self.current = None
+        phase['duration'] = time.perf_counter() - self.origin - phase['start'] - phase.pop('paused', 0.0)
+        start_position = phase.pop('position')
+        if not start_position == None and not position == None:
+            phase['bytes'] += position - start_position
+        self.phases.append(phase)
+    
+    @contextmanager
+    def phase(self, name, items = 0, bytes = 0):
+        #"""Time the body of a with statement as the phase [name]"""
+        if not self.enabled:
+            yield self
+            return
+        outer = self.current
+        self.current = None
+        self.begin(name)
+        self.count(items, bytes)
+        try:
+            yield self
+        finally:
+            self.end()
+            self.current = outer
+    
+    @contextmanager
+    def paused(self):
+        #"""Leave the body of a with statement out of the current phase's time, for a generator
+        #yielding inside a phase while it waits for the next timer event"""
+        phase = self.current
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            if phase:
+                phase['paused'] = phase.get('paused', 0.0) + time.perf_counter() - start
+    
+    def summary(self) -> list:
+        #"""One dict per phase name in the order they first ran, with the total time, bytes, items and their rates"""
+        totals = {}
+        for phase in self.phases:
+            total = totals.setdefault(phase['name'], {'name':phase['name'], 'duration':0.0, 'bytes':0, 'items':0, 'count':0})
+            total['duration'] += phase['duration']
+            total['bytes'] += phase['bytes']
+            total['items'] += phase['items']
+            total['count'] += 1
+        for total in totals.values():
+            total['bytes_per_second'] = total['bytes'] / total['duration'] if total['duration'] > 0 else 0.0
+            total['items_per_second'] = total['items'] / total['duration'] if total['duration'] > 0 else 0.0
+        return list(totals.values())
+    
+    def lines(self) -> list:
+        #"""The summary as readable lines for the operator report"""
+        lines = []
+        for total in self.summary():
+            line = '{0}: {1:.1f} ms'.format(total['name'], total['duration'] * 1000)
+            if total['bytes'] > 0:
+                line += ', {0:.1f} MB/s'.format(total['bytes_per_second'] / (1024 * 1024))
+            if total['items'] > 0:
+                line += ', {0:.0f} items/s'.format(total['items_per_second'])
+            lines.append(line)
+        return lines
+    
+    def write_json(self, filepath):
+        with open(filepath, 'w') as file:
+            json.dump({'phases':self.phases, 'summary':self.summary()}, file, indent=1)
+    
+    def write_trace(self, filepath):
+        #"""Write the phases in the Chrome trace event format, for chrome://tracing or Perfetto"""
+        events = []
+        for phase in self.phases:
+            events.append({'name':phase['name'], 'ph':'X', 'ts':phase['start'] * 1e6, 'dur':phase['duration'] * 1e6,
+                           'pid':1, 'tid':1, 'args':{'bytes':phase['bytes'], 'items':phase['items']}})
+        with open(filepath, 'w') as file:
+            json.dump({'traceEvents':events, 'displayTimeUnit':'ms'}, file)
+
+def timed(iterable, profiler, name):
+    #"""Yield the items of [iterable], timing every wait for the next one as the phase [name]"""
+    iterator = iter(iterable)
+    while True:
+        with profiler.phase(name) as phase:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            phase.count(1)
+        yield item
@@ -0,0 +1,81 @@
+import bpy
+import os
+import hashlib
+
+#Imported images and materials are tagged with a custom property holding what they were made from,
+#the texture payload hash or the FX name. Custom properties are saved with the .blend, so later
+#imports find them again in the same session and after the file is reopened.
+TEXTURE_HASH = 'cpmodel_texture_hash'
+MATERIAL_FX = 'cpmodel_fx'
+
+#Objects are tagged with the model file and element they were made from, and their meshes with a hash of
+#what they were built from, so importing the same file again can find them and tell what changed
+MODEL_PATH = 'cpmodel_path'
+ELEMENT_NAME = 'cpmodel_element'
+MESH_HASH = 'cpmodel_mesh_hash'
+
+def texture_hash(texture) -> str:
+    #"""Hash of everything that ends up in an image made from [texture]: its format, size and payload"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((texture['dxt'], texture['width'], texture['height'], texture['mipmaps'])).encode())
+    digest.update(memoryview(texture['data']))
+    return digest.hexdigest()
+
+class DatablockRegistry:
+    #"""Tagged datablocks of one bpy.data collection by their tag. The index is rebuilt by refresh()
+    #at the start of every import as datablock references don't survive undo or reloading the file.
+    #Only datablocks passing [reusable] are indexed when it is given."""
+    def __init__(self, collection, key_property, reusable = None):
+        self.collection = collection
+        self.key_property = key_property
+        self.reusable = reusable
+        self.index = {}
+
+    def refresh(self):
+        self.index = {}
+        for datablock in self.collection:
+            key = datablock.get(self.key_property)
+            if not key == None and (self.reusable == None or self.reusable(datablock)):
+                self.index.setdefault(key, datablock)
+        return self
+
+    def get(self, key):
+        return self.index.get(key)
+
+    def add(self, key, datablock):
+        datablock[self.key_property] = key
+        self.index[key] = datablock
+        return datablock
+
+def keeps_pixels(image) -> bool:
+    #"""Whether [image] has its pixels after the .blend is reopened. In memory textures that weren't packed
+    #are generated images, which come back with the blank generated fill."""
+    return not (image.source == 'GENERATED' and image.packed_file == None)
+
+def image_registry() -> DatablockRegistry:
+    return DatablockRegistry(bpy.data.images, TEXTURE_HASH, keeps_pixels).refresh()
+
+def material_registry() -> DatablockRegistry:
+    return DatablockRegistry(bpy.data.materials, MATERIAL_FX).refresh()
+
+def model_path(filepath) -> str:
+    return os.path.normcase(os.path.abspath(filepath))
+
+def existing_objects(filepath) -> dict:
+    #"""Lists of the objects an earlier import of [filepath] made, by element name in name order"""
+    path = model_path(filepath)
+    objects = {}
+    for object in bpy.data.objects:
+        if object.get(MODEL_PATH) == path:
+            objects.setdefault(object.get(ELEMENT_NAME), []).append(object)
+    return objects
+
+def get_material(registry, fx):
+    #"""The material for [fx], untagged materials of the same name made before the registry existed are adopted"""
+    mat = registry.get(fx)
+    if mat is None:
+        mat = bpy.data.materials.get(fx)
+        if mat is None or not mat.get(MATERIAL_FX) == None:
+            mat = bpy.data.materials.new(fx)
+        registry.add(fx, mat)
+    return mat
@@ -0,0 +1,135 @@
+import numpy as np
+
+from .cpmodel import vertex_stream_dtype
+from .writer import write_cpmodel
+
+#Structurally valid models made of random data, for benchmarks and for trying the tools without game files.
+#Every vertex stream carries all five attribute types and face streams alternate between lists and strips.
+
+DXT1 = 0x31545844
+
+#The first attribute is the position and the third the uvs the importer reads, the rest cover the remaining types.
+#Vertex stream i adds i more half2 attributes so every stream has a layout of its own, as the importer requires.
+BASE_LAYOUT = [0x6, 0x6, 0x9, 0xB, 0xA, 0x8]
+
+def random_attribute(rng, data_type, count) -> np.ndarray:
+    #"""(count, 4) values that survive packing as [data_type] unchanged"""
+    if data_type == 0xA:
+        return rng.integers(0, 256, (count, 4)).astype(np.uint8)
+    if data_type == 0xB:
+        return (rng.integers(0, 256, (count, 4)) / 255.0).astype(np.float32)
+    values = rng.uniform(-16.0, 16.0, (count, 4)).astype(np.float32)
+    if data_type in (0x8, 0x9):
+        values = values.astype(np.float16).astype(np.float32)
+    if data_type in (0x6, 0x8):
+        values[:, 3] = 0.0
+    if data_type == 0x8:
+        values[:, 2] = 0.0
+    return values
+
+def random_faces(rng, face_type, vert_count, triangle_count) -> np.ndarray:
+    #"""Indices below [vert_count] drawing [triangle_count] triangles as a list (0) or a strip (1)"""
+    if face_type == 0:
+        return rng.integers(0, vert_count, triangle_count * 3).astype(np.uint16)
+    return rng.integers(0, vert_count, triangle_count + 2).astype(np.uint16)
+
+def generate_model(elements = 8, vertex_streams = 2, vertices = 4096, face_streams = 2, meshes = 8, triangles = 4096, textures = 1, texture_size = 64, seed = 0) -> dict:
+    #"""A random model dict for write_cpmodel. [vertices] and [triangles] are per vertex stream and per mesh,
+    #the vertex streams are split evenly between the meshes using them. Elements form a random hierarchy under element 0."""
+    rng = np.random.default_rng(seed)
+    meshes = max(meshes, 1)
+    
+    model = {}
+    model['elements'] = []
+    model['models'] = [{'name':'synthetic', 'matrix':{'position':[0.0, 0.0, 0.0]}, 'bounding_box':({'x':-16.0, 'z':-16.0, 'y':-16.0}, {'x':16.0, 'z':16.0, 'y':16.0}),
+                        'element_count':elements}]
+    for i in range(elements):
+        element = {}
+        element['name'] = 'element_{0}'.format(i)
+        element['model_index'] = 0
+        element['element_index'] = i
+        element['matrix'] = {'position':rng.uniform(-8.0, 8.0, 3).tolist()}
+        element['bounding_box'] = model['models'][0]['bounding_box']
+        if i > 0:
+            element['parent'] = int(rng.integers(0, i))
+        model['elements'].append(element)
+    
+    model['vert_definitions'] = []
+    model['vertex_streams'] = []
+    for i in range(vertex_streams):
+        layout = BASE_LAYOUT + [0x8] * i
+        definitions = [{'type':data_type} for data_type in layout]
+        model['vertex_streams'].append({'definition':definitions, 'attributes':[random_attribute(rng, data_type, vertices) for data_type in layout]})
+        model['vert_definitions'].append([{'prefix':0, 'type':data_type} for data_type in layout])
+    
+    #Definition offsets and strides follow from the packed layout
+    strides = []
+    for definitions in model['vert_definitions']:
+        dtype = vertex_stream_dtype(definitions)
+        strides.append(dtype.itemsize)
+        for j, definition in enumerate(definitions):
+            definition['offset'] = dtype.fields['a{0}'.format(j)][1]
+    
+    model['fx_files'] = ['material_{0}.fx'.format(i) for i in range(max(1, meshes // 4))]
+    
+    model['textures'] = []
+    for i in range(textures):
+        texture = {}
+        texture['name'] = 'textures\\synthetic_{0}'.format(i)
+        texture['dxt'] = DXT1
+        texture['width'] = texture_size
+        texture['height'] = texture_size
+        texture['mipmaps'] = 1
+        texture['data'] = rng.integers(0, 256, texture_size * texture_size // 2).astype(np.uint8)
+        model['textures'].append(texture)
+    
+    stream_meshes = [list(range(i, meshes, vertex_streams)) for i in range(vertex_streams)]
+    faces = [[] for i in range(face_streams)]
+    face_counts = [0] * face_streams
+    
+    model['meshes'] = []
+    for i in range(meshes):
+        vertex_stream = i % vertex_streams
+        face_stream = i % face_streams
+        face_type = face_stream % 2
+        
+        #The meshes of a stream share its vertices in equal consecutive ranges of at most 64k
+        users = stream_meshes[vertex_stream]
+        vert_count = min(vertices // len(users), 0x10000)
+        vert_start = users.index(i) * vert_count
+        
+        indices = random_faces(rng, face_type, vert_count, triangles)
+        faces[face_stream].append(indices)
+        
+        mesh = {}
+        mesh['material_index'] = i % len(model['fx_files'])
+        mesh['definition'] = vertex_stream
+        mesh['face_type'] = face_type
+        mesh['face_stream_index'] = face_stream
+        mesh['object_index'] = i % elements
+        mesh['data1'] = [{'face_offset':face_counts[face_stream], 'face_count':len(indices), 'vert_offset':0, 'vert_count':vert_count}]
+        mesh['data2'] = [{'vOffset':vert_start * strides[vertex_stream]}]
+        model['meshes'].append(mesh)
+        face_counts[face_stream] += len(indices)
+    
+    model['face_streams'] = [{'faces':np.concatenate(stream) if stream else np.zeros(0, np.uint16)} for stream in faces]
+    return model
+
+def write_synthetic_model(filepath, **options) -> dict:
+    #"""Generate a model with generate_model(**[options]) and write it to [filepath]"""
+    model = generate_model(**options)
+    write_cpmodel(filepath, model)
+    return model
+
+
+if __name__ == "__main__":
+    #Standalone use: python -m BlurImportExport.synthetic output.model [--vertices 4096] ...
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Write a CPModel made of random data")
+    parser.add_argument('file')
+    for name, default in (('elements', 8), ('vertex-streams', 2), ('vertices', 4096), ('face-streams', 2), ('meshes', 8),
+                          ('triangles', 4096), ('textures', 1), ('texture-size', 64), ('seed', 0)):
+        parser.add_argument('--' + name, type=int, default=default)
+    args = vars(parser.parse_args())
+    write_synthetic_model(args.pop('file'), **args)
@@ -0,0 +1,17 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+#Tests of the parts of the add-on that run without Blender, run with: python -m pytest tests
+
+#The add-on is a package named after its directory, import it the way Blender would
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ROOT))
+ADDON = os.path.basename(ROOT)
+
+@pytest.fixture(scope='session')
+def addon_module():
+    #"""Import a module of the add-on by name"""
+    return lambda name: importlib.import_module(ADDON + '.' + name)
@@ -0,0 +1,72 @@
+import struct
+
+import numpy as np
+import pytest
+
+#Known blocks with hand worked texels. Texels are numbered row by row from the top left,
+#decode_texture returns the rows bottom to top.
+
+RED = 0xF800
+BLUE = 0x001F
+
+def color_block(color0, color1, indices) -> bytes:
+    bits = sum(index << (2 * i) for i, index in enumerate(indices))
+    return struct.pack('<HHI', color0, color1, bits)
+
+def alpha_block(alpha0, alpha1, indices) -> bytes:
+    bits = sum(index << (3 * i) for i, index in enumerate(indices))
+    return bytes((alpha0, alpha1)) + bits.to_bytes(6, 'little')
+
+def texture(code, data, width = 4, height = 4) -> dict:
+    #The header stores the width as the height and the other way around, see texture_size
+    return {'name':'test', 'dxt':int.from_bytes(code, 'little'), 'width':height, 'height':width, 'data':data}
+
+def texel(pixels, index) -> list:
+    return pixels[len(pixels) - 1 - index // 4, index % 4].tolist()
+
+@pytest.fixture
+def bc(addon_module):
+    return addon_module('bc')
+
+def test_bc1_palette(bc):
+    pixels = bc.decode_texture(texture(b'DXT1', color_block(RED, BLUE, [0, 1, 2, 3] * 4)))
+    assert pixels.shape == (4, 4, 4)
+    assert texel(pixels, 0) == [1, 0, 0, 1]
+    assert texel(pixels, 1) == [0, 0, 1, 1]
+    assert np.allclose(texel(pixels, 2), [2 / 3, 0, 1 / 3, 1])
+    assert np.allclose(texel(pixels, 3), [1 / 3, 0, 2 / 3, 1])
+
+def test_bc1_punchthrough(bc):
+    #color0 <= color1 switches to 3 colors and transparent black
+    pixels = bc.decode_texture(texture(b'DXT1', color_block(BLUE, RED, [2, 3] + [0] * 14)))
+    assert np.allclose(texel(pixels, 0), [0.5, 0, 0.5, 1])
+    assert texel(pixels, 1) == [0, 0, 0, 0]
+    assert texel(pixels, 2) == [0, 0, 1, 1]
+
+def test_bc3_alpha(bc):
+    block = alpha_block(255, 0, [0, 1, 2, 7] + [0] * 12) + color_block(RED, BLUE, [0] * 16)
+    pixels = bc.decode_texture(texture(b'DXT5', block))
+    assert [texel(pixels, i)[3] for i in (0, 1, 4)] == [1, 0, 1]
+    assert np.isclose(texel(pixels, 2)[3], 6 / 7)
+    assert np.isclose(texel(pixels, 3)[3], 1 / 7)
+    assert texel(pixels, 0)[:3] == [1, 0, 0]
+
+def test_bc3_six_alpha_mode(bc):
+    block = alpha_block(0, 255, [6, 7, 2] + [0] * 13) + color_block(RED, BLUE, [0] * 16)
+    pixels = bc.decode_texture(texture(b'DXT5', block))
+    assert texel(pixels, 0)[3] == 0
+    assert texel(pixels, 1)[3] == 1
+    assert np.isclose(texel(pixels, 2)[3], 51 / 255)
+
+def test_block_layout(bc):
+    #An 8x4 texture is two blocks side by side, the right one blue
+    pixels = bc.decode_texture(texture(b'DXT1', color_block(RED, BLUE, [0] * 16) + color_block(RED, BLUE, [1] * 16), width=8))
+    assert pixels.shape == (4, 8, 4)
+    assert pixels[:, :4, 0].min() == 1
+    assert pixels[:, 4:, 2].min() == 1
+
+def test_undecodable_textures(bc):
+    textures = [texture(b'DXT1', color_block(RED, BLUE, [0] * 16)), texture(b'DXT1', b'\0' * 4), texture(b'ATI2', b'\0' * 16)]
+    decoded = bc.decode_textures(textures)
+    assert decoded[0].shape == (4, 4, 4)
+    assert decoded[1:] == [None, None]
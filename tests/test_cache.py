@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pytest
+
+@pytest.fixture
+def cache(addon_module):
+    return addon_module('cache')
+
+@pytest.fixture(scope='module')
+def model_file(addon_module, tmp_path_factory):
+    filepath = str(tmp_path_factory.mktemp('cache') / 'small.model')
+    addon_module('synthetic').write_synthetic_model(filepath, elements=4, vertex_streams=2, vertices=64, face_streams=2, meshes=4,
+                                                    triangles=32, textures=2, texture_size=16)
+    return filepath
+
+def assert_same(a, b):
+    #"""Compare two decoded models the way the importer reads them, arrays by dtype and content"""
+    if isinstance(a, np.ndarray) or isinstance(a, memoryview):
+        a = np.asarray(a)
+        b = np.asarray(b)
+        assert a.dtype == b.dtype
+        assert a.shape == b.shape
+        assert a.tobytes() == b.tobytes()
+    elif hasattr(a, 'array'):
+        assert_same(a.array, b.array)
+        assert a.names == b.names
+        assert_same(a.lists, b.lists)
+    elif isinstance(a, dict):
+        assert a.keys() == b.keys()
+        for key in a:
+            assert_same(a[key], b[key])
+    elif isinstance(a, (list, tuple)):
+        assert type(a) == type(b)
+        assert len(a) == len(b)
+        for item_a, item_b in zip(a, b):
+            assert_same(item_a, item_b)
+    else:
+        assert a == b
+
+def test_archive_round_trip(addon_module, cache, model_file, tmp_path):
+    model = addon_module('cpmodel').LazyCPModel(model_file).load()
+    archive = str(tmp_path / 'model.npz')
+    cache.write_archive(archive, model)
+    cached = cache.read_archive(archive)
+    
+    assert_same(model, cached)
+    
+    #Everything is a read-only view into the archive
+    assert not cached['vertex_streams'][0]['attributes'][0].flags.writeable
+    assert not cached['meshes'].array.flags.writeable
+    assert not np.asarray(cached['textures'][0]['data']).flags.writeable
+
+def test_padded_mesh_lists(addon_module, cache, tmp_path):
+    #The mesh lists as the parser reads them, views with the markers between their fields left as padding
+    cpmodel = addon_module('cpmodel')
+    lists = {}
+    lists['data1'] = np.frombuffer(np.arange(10, dtype='<i4').tobytes(), cpmodel.MESH_DATA1_DTYPE)
+    lists['data2'] = np.frombuffer(np.arange(16, dtype='<i4').tobytes(), cpmodel.MESH_DATA2_DTYPE)
+    meshes = np.zeros(2, cpmodel.MESH_DTYPE)
+    meshes['data1_start'] = [0, 1]
+    meshes['data2_start'] = [0, 1]
+    meshes['data1_count'] = meshes['data2_count'] = 1
+    
+    archive = str(tmp_path / 'meshes.npz')
+    cache.write_archive(archive, {'meshes':cpmodel.RecordTable(meshes, lists=lists)})
+    cached = cache.read_archive(archive)['meshes']
+    
+    assert_same(cached.lists, lists)
+    assert cached.first('data2')['vOffset'].tolist() == [3, 11]
+    assert cached[1]['data1'] == [{'face_offset':6, 'face_count':7, 'vert_offset':8, 'vert_count':9}]
+
+def test_cache_hit(cache, model_file, tmp_path, monkeypatch):
+    parse_cache = cache.ParseCache(str(tmp_path))
+    model = parse_cache.load(model_file)
+    
+    def parse(*args, **kwargs):
+        raise AssertionError('the cached model was parsed again')
+    monkeypatch.setattr(cache, 'LazyCPModel', parse)
+    assert_same(model, parse_cache.load(model_file))
+
+def test_evict_skips_failures(cache, tmp_path, monkeypatch):
+    for i in range(4):
+        path = str(tmp_path / '{0}.npz'.format(i))
+        with open(path, 'wb') as file:
+            file.write(bytes(100))
+        os.utime(path, (i, i))
+    
+    #The oldest entry is still mapped somewhere and can't be removed
+    remove = os.remove
+    def locked_remove(path):
+        if os.path.basename(path) == '0.npz':
+            raise PermissionError(path)
+        remove(path)
+    monkeypatch.setattr(cache.os, 'remove', locked_remove)
+    
+    cache.ParseCache(str(tmp_path), 150).evict()
+    assert sorted(os.listdir(str(tmp_path))) == ['0.npz', '3.npz']
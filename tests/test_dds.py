@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+@pytest.fixture
+def dds(addon_module):
+    return addon_module('dds')
+
+def texture(name, data = b'\0' * 8) -> dict:
+    return {'name':name, 'data':data, 'dxt':0x31545844, 'width':4, 'height':4, 'pitch':8, 'mipmaps':1}
+
+@pytest.mark.parametrize('name', ['../../etc/cron.d/x', '..\\..\\..\\home\\x', 'C:\\Windows\\x', '\\\\server\\share\\x', '/abs/x', '.\\x\\..\\..\\x'])
+def test_paths_stay_inside(dds, tmp_path, name):
+    root = os.path.join(str(tmp_path), 'textures')
+    filepath = dds.texture_path(str(tmp_path), texture(name))
+    assert os.path.commonpath([root, filepath]) == root
+    assert os.path.basename(filepath) == 'x.dds'
+
+def test_path_separators(dds, tmp_path):
+    expected = os.path.join(str(tmp_path), 'textures', 'a', 'b', 'c.dds')
+    assert dds.texture_path(str(tmp_path), texture('a\\b\\c')) == expected
+    assert dds.texture_path(str(tmp_path), texture('a/b\\c')) == expected
+
+def test_extract_textures(dds, tmp_path):
+    textures = [texture('a\\b', b'1' * 8), texture('a\\b', b'2' * 8), texture('a\\b', b'1' * 8), texture('c', b'3' * 8)]
+    filepaths, written = dds.extract_textures(textures, str(tmp_path))
+    #Same name and different payloads get their own files, identical textures share one
+    assert len(set(filepaths)) == 3
+    assert filepaths[0] == filepaths[2]
+    assert written == [True, True, True, True]
+    for filepath, tx in zip(filepaths, textures):
+        with open(filepath, 'rb') as file:
+            assert file.read()[dds.DDS_HEADER.size:] == tx['data']
+    
+    assert dds.extract_textures(textures[3:], str(tmp_path)) == ([filepaths[3]], [False])
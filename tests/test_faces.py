@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def cpmodel(addon_module):
+    return addon_module('cpmodel')
+
+def strip_walk(faces, face_start, face_count, vert_offset) -> list:
+    #"""The triangle strip loop the importer used before triangulate_faces, Blender refused duplicate faces"""
+    triangles = []
+    seen = set()
+    for i in range(face_start, face_start + face_count - 2):
+        i1 = faces[i] - vert_offset
+        i2 = faces[i+1] - vert_offset
+        i3 = faces[i+2] - vert_offset
+        if i1 == i2 or i2 == i3 or i3 == i1:
+            continue
+        triangle = [i1, i2, i3] if (i - face_start) % 2 == 1 else [i1, i3, i2]
+        if not frozenset(triangle) in seen:
+            seen.add(frozenset(triangle))
+            triangles.append(triangle)
+    return triangles
+
+def test_triangle_list(cpmodel):
+    faces = np.array([9, 10, 11, 11, 10, 12, 12, 12, 13, 9, 10, 11, 5], np.uint16)
+    triangles = cpmodel.triangulate_faces(faces, 0, 0, len(faces), 9)
+    #The degenerate and repeated triangles are dropped, so is the incomplete one at the end
+    assert triangles.tolist() == [[0, 1, 2], [2, 1, 3]]
+
+def test_strip_restart(cpmodel):
+    #Two strips joined by repeating the last index of one and the first of the next
+    faces = np.array([0, 1, 2, 3, 4, 4, 10, 10, 11, 12, 13], np.uint16)
+    triangles = cpmodel.triangulate_faces(faces, 1, 0, len(faces))
+    assert triangles.tolist() == strip_walk(faces, 0, len(faces), 0)
+    assert len(triangles) == 5
+
+def test_strip_matches_walk(cpmodel):
+    rng = np.random.default_rng(1)
+    faces = rng.integers(100, 120, 2000).astype(np.uint16)
+    for face_start, face_count in ((0, 2000), (1, 999), (37, 3), (5, 2)):
+        triangles = cpmodel.triangulate_faces(faces, 1, face_start, face_count, 100)
+        assert triangles.tolist() == strip_walk(faces, face_start, face_count, 100)
+
+def test_unknown_face_type(cpmodel):
+    with pytest.raises(cpmodel.CPModelFormatError):
+        cpmodel.triangulate_faces(np.zeros(3, np.uint16), 2, 0, 3)
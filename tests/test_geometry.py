@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def geometry(addon_module):
+    return addon_module('geometry')
+
+def quad(uvs):
+    #"""Two triangles of a unit quad whose four corners are each stored twice, at index i and i + 4"""
+    positions = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]] * 2, np.float32)
+    colors = [np.concatenate((uvs, np.zeros((8, 2))), axis=1).astype(np.float32)]
+    triangles = np.array([[0, 1, 2], [4, 6, 7]], np.int64)
+    return positions, colors, triangles
+
+def test_weld_exact_duplicates(geometry):
+    uvs = np.array([[0, 0], [1, 0], [1, 1], [0, 1]] * 2)
+    positions, colors, triangles = geometry.weld_vertices(*quad(uvs))
+    assert positions.tolist() == [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]]
+    assert colors[0][:, :2].tolist() == uvs[:4].tolist()
+    assert triangles.tolist() == [[0, 1, 2], [0, 2, 3]]
+
+def test_weld_keeps_uv_seams(geometry):
+    #The copies of corners 0 and 2 have other uvs, a seam runs along the diagonal
+    uvs = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0.5, 0], [1, 0], [0.5, 1], [0, 1]])
+    positions, colors, triangles = geometry.weld_vertices(*quad(uvs))
+    assert len(positions) == 6
+    assert colors[0][:, :2].tolist() == [[0, 0], [1, 0], [1, 1], [0, 1], [0.5, 0], [0.5, 1]]
+    assert triangles.tolist() == [[0, 1, 2], [4, 5, 3]]
+
+def test_weld_drops_collapsed_triangles(geometry):
+    positions = np.array([[0, 0, 0], [0, 0, 0], [1, 0, 0], [0, 1, 0]], np.float32)
+    triangles = np.array([[0, 1, 2], [0, 2, 3], [1, 2, 3]], np.int64)
+    positions, colors, triangles = geometry.weld_vertices(positions, [], triangles)
+    assert len(positions) == 3
+    assert triangles.tolist() == [[0, 1, 2]]
+
+def grid(size) -> np.ndarray:
+    #"""Two triangles for every square of a [size] x [size] vertex grid"""
+    rows, columns = np.meshgrid(np.arange(size - 1), np.arange(size - 1), indexing='ij')
+    corners = (rows * size + columns).ravel()
+    return np.concatenate((np.stack((corners, corners + 1, corners + size), axis=1),
+                           np.stack((corners + 1, corners + size + 1, corners + size), axis=1)))
+
+def triangle_set(triangles) -> set:
+    #"""Triangles up to rotation, which keeps their winding"""
+    return {min((tuple(triangle[i:] + triangle[:i]) for i in range(3))) for triangle in np.asarray(triangles).tolist()}
+
+def test_cache_statistics(geometry):
+    statistics = geometry.cache_statistics(np.array([[0, 1, 2], [2, 1, 3], [4, 5, 6]]), cache_size=4)
+    assert statistics['misses'] == 7
+    assert statistics['vertices'] == 7
+    assert statistics['acmr'] == pytest.approx(7 / 3)
+    assert statistics['atvr'] == 1.0
+    #Vertex 0 has left a cache of 3 by the time it is used again
+    assert geometry.cache_misses(np.array([[0, 1, 2], [3, 4, 5], [0, 1, 2]]), cache_size=3) == 9
+
+def test_tipsify_keeps_triangles(geometry):
+    triangles = grid(12)
+    optimized = geometry.tipsify(triangles, 144)
+    assert len(optimized) == len(triangles)
+    assert triangle_set(optimized) == triangle_set(triangles)
+
+def test_tipsify_shuffled_grid(geometry):
+    triangles = np.random.default_rng(0).permutation(grid(40))
+    before = geometry.cache_statistics(triangles)['acmr']
+    after = geometry.cache_statistics(geometry.tipsify(triangles, 1600))['acmr']
+    assert after < before
+    assert after < 1.0
+
+def test_reorder_vertices(geometry):
+    triangles = np.array([[5, 2, 7], [2, 7, 0]])
+    order, renumbered = geometry.reorder_vertices(triangles, 8)
+    assert order[:4].tolist() == [5, 2, 7, 0]
+    assert sorted(order.tolist()) == list(range(8))
+    assert renumbered.tolist() == [[0, 1, 2], [1, 2, 3]]
+    assert np.array_equal(order[renumbered], triangles)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def parent_order(addon_module):
+    return addon_module('cpmodel').parent_order
+
+def assert_parents_first(order, parents):
+    position = {index:i for i, index in enumerate(order.tolist())}
+    for child, parent in enumerate(parents.tolist()):
+        if parent >= 0:
+            assert position[parent] < position[child]
+
+def test_parents_first(parent_order):
+    #Children listed ahead of their parents, as the elements of a file may be
+    order, parents = parent_order([3, 0, -1, 2, 1])
+    assert parents.tolist() == [3, 0, -1, 2, 1]
+    assert order.tolist() == [2, 3, 0, 1, 4]
+    assert_parents_first(order, parents)
+
+def test_deep_chain(parent_order):
+    #Every element the child of the next one, the last is the root
+    chain = np.arange(1, 1001)
+    chain[-1] = -1
+    order, parents = parent_order(chain)
+    assert order.tolist() == list(range(1000))[::-1]
+    assert_parents_first(order, parents)
+
+def test_cycles(parent_order):
+    #0 and 1 point at each other, 2 is their child, 3 its own parent, 4 and 5 are fine
+    order, parents = parent_order([1, 0, 0, 3, -1, 4])
+    assert parents.tolist() == [-1, -1, -1, -1, -1, 4]
+    assert sorted(order.tolist()) == list(range(6))
+    assert_parents_first(order, parents)
+
+def test_out_of_range(parent_order):
+    order, parents = parent_order([-1, 7, -5, 0, 1])
+    assert parents.tolist() == [-1, -1, -1, 0, 1]
+    assert_parents_first(order, parents)
+
+def test_empty(parent_order):
+    order, parents = parent_order([])
+    assert len(order) == 0
+    assert len(parents) == 0
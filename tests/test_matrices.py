@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+#12 stored floats: the 3x3 basis row by row, then the position, both with the file's y and z axes
+STORED = [0, 1, 0,  -1, 0, 0,  0, 0, 1,  2, 3, 4]
+
+def test_blender_matrices(addon_module):
+    matrix = addon_module('cpmodel').blender_matrices([STORED])[0]
+    #Row-major with the position in the last column, the way Matrix() takes its rows
+    assert matrix[:3, 3].tolist() == [2, 4, 3]
+    assert matrix[3].tolist() == [0, 0, 0, 1]
+    assert matrix[:3, :3].tolist() == [[0, 0, 1], [0, 1, 0], [-1, 0, 0]]
+
+def test_matrix_basis_keeps_position(addon_module):
+    bpy = pytest.importorskip('bpy')
+    importer = addon_module('importer')
+    
+    object = bpy.data.objects.new('matrix_test', None)
+    try:
+        object.matrix_basis = importer.object_matrices(np.array([STORED], np.float32))[0]
+        assert list(object.location) == pytest.approx([2, 4, 3])
+        assert np.array(object.matrix_basis)[3].tolist() == [0, 0, 0, 1]
+    finally:
+        bpy.data.objects.remove(object)
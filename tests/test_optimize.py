@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def parsed(addon_module, tmp_path):
+    filepath = str(tmp_path / 'optimize.model')
+    model = addon_module('synthetic').generate_model(elements=2, vertex_streams=2, vertices=256, face_streams=2, meshes=4, triangles=64, textures=0)
+    #One index of the first mesh's triangle list points past its vertices
+    model['face_streams'][0]['faces'][5] = 200
+    addon_module('writer').write_cpmodel(filepath, model)
+    return model, addon_module('cpmodel').LazyCPModel(filepath).load()
+
+def test_mesh_vertex_streams(addon_module, parsed):
+    model, loaded = parsed
+    streams, starts, attribute_counts = addon_module('cpmodel').mesh_vertex_streams(loaded)
+    assert streams.tolist() == [0, 1, 0, 1]
+    #Each stream's 256 vertices are split between its two meshes
+    assert starts.tolist() == [0, 0, 128, 128]
+    assert attribute_counts.tolist() == [6, 7, 6, 7]
+
+def test_optimize_model(addon_module, parsed):
+    model, loaded = parsed
+    optimized, statistics = addon_module('optimize').optimize_model(loaded)
+    
+    assert [mesh['dropped_triangles'] for mesh in statistics['meshes']] == [1, 0, 0, 0]
+    assert statistics['after']['acmr'] <= statistics['before']['acmr']
+    
+    #Every optimized mesh only indexes its own copy of its vertices
+    for mesh, before in zip(optimized['meshes'], statistics['meshes']):
+        data1 = mesh['data1'][0]
+        assert data1['face_count'] == before['after']['triangles'] * 3
+        faces = optimized['face_streams'][mesh['face_stream_index']]['faces'][data1['face_offset']:data1['face_offset'] + data1['face_count']]
+        assert faces.max() < data1['vert_count']
@@ -0,0 +1,53 @@
+import struct
+
+import pytest
+
+@pytest.fixture
+def cpmodel(addon_module):
+    return addon_module('cpmodel')
+
+@pytest.fixture(scope='module')
+def model_bytes(addon_module, tmp_path_factory):
+    filepath = str(tmp_path_factory.mktemp('reader') / 'small.model')
+    addon_module('synthetic').write_synthetic_model(filepath, elements=4, vertex_streams=2, vertices=64, face_streams=2, meshes=4,
+                                                    triangles=32, textures=1, texture_size=16)
+    with open(filepath, 'rb') as file:
+        return file.read()
+
+def write(tmp_path, data, name = 'test') -> str:
+    #A file is never written again, the readers keep it mapped
+    filepath = str(tmp_path / (name + '.model'))
+    with open(filepath, 'wb') as file:
+        file.write(data)
+    return filepath
+
+def test_advance_to(cpmodel, tmp_path):
+    marker = struct.pack('<i', 0x4152)
+    reader = cpmodel.Reader(write(tmp_path, b'\0' * 3 + marker + b'\0' * 5 + marker + b'\0'))
+    reader.advance_to(0x4152)
+    assert reader.pos() == 3
+    reader.advance()
+    reader.advance_to(0x4152)
+    assert reader.pos() == 12
+    
+    reader.advance()
+    with pytest.raises(cpmodel.CPModelFormatError):
+        reader.advance_to(0x4152)
+    with pytest.raises(cpmodel.CPModelFormatError):
+        reader.advance_to(0x1415202)
+
+def test_empty_file(cpmodel, tmp_path):
+    filepath = write(tmp_path, b'', 'empty')
+    with pytest.raises(cpmodel.CPModelFormatError):
+        cpmodel.Reader(filepath).read_int()
+    with pytest.raises(cpmodel.CPModelFormatError):
+        cpmodel.LazyCPModel(filepath)
+
+def test_whole_file(cpmodel, tmp_path, model_bytes):
+    assert len(cpmodel.LazyCPModel(write(tmp_path, model_bytes))['meshes']) == 4
+
+def test_truncated_file(cpmodel, tmp_path, model_bytes):
+    #Cut inside every section, the closing marker after the meshes is never read
+    for cut in range(0, len(model_bytes) - 4, 61):
+        with pytest.raises(cpmodel.CPModelFormatError):
+            cpmodel.LazyCPModel(write(tmp_path, model_bytes[:cut], str(cut)))
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+LIST_DTYPE = np.dtype([('value', '<i4')])
+RECORD_DTYPE = np.dtype([('data_start', '<i4'), ('data_count', '<i4')])
+
+@pytest.fixture
+def cpmodel(addon_module):
+    return addon_module('cpmodel')
+
+def table(cpmodel, counts):
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    array = np.array(list(zip(starts.tolist(), counts)), RECORD_DTYPE)
+    data = np.arange(sum(counts), dtype=np.int32).astype(LIST_DTYPE)
+    return cpmodel.RecordTable(array, lists={'data':data})
+
+def test_first(cpmodel):
+    assert table(cpmodel, [1, 2, 1]).first('data')['value'].tolist() == [0, 1, 3]
+
+def test_first_of_empty_list(cpmodel):
+    #Record 1 would otherwise get record 2's entry
+    with pytest.raises(cpmodel.CPModelFormatError):
+        table(cpmodel, [1, 0, 1]).first('data')
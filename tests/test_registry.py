@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+#Needs Blender's bpy, as a module or by running pytest inside Blender
+
+@pytest.fixture
+def bpy():
+    return pytest.importorskip('bpy')
+
+def test_unpacked_generated_image_not_reused(bpy, addon_module):
+    registry = addon_module('registry')
+    importer = addon_module('importer')
+    
+    texture = {'name':'registry_test', 'dxt':0x31545844, 'width':4, 'height':4, 'mipmaps':1, 'data':bytes(8)}
+    pixels = np.ones((4, 4, 4), np.float32)
+    images = registry.image_registry()
+    key = registry.texture_hash(texture)
+    
+    image = images.add(key, importer.create_image(texture, pixels, False))
+    try:
+        #Reopening the .blend would leave it blank, so the next import makes it again
+        assert registry.image_registry().get(key) is None
+        image.pack()
+        assert registry.image_registry().get(key) == image
+    finally:
+        bpy.data.images.remove(image)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def modules(addon_module):
+    return addon_module('cpmodel'), addon_module('writer'), addon_module('synthetic')
+
+def write_and_parse(modules, model, tmp_path):
+    cpmodel, writer, synthetic = modules
+    filepath = str(tmp_path / 'round_trip.model')
+    writer.write_cpmodel(filepath, model)
+    return cpmodel.LazyCPModel(filepath).load()
+
+def test_round_trip(modules, tmp_path):
+    cpmodel, writer, synthetic = modules
+    model = synthetic.generate_model(elements=6, vertex_streams=2, vertices=256, face_streams=2, meshes=6, triangles=64, textures=2, texture_size=16)
+    parsed = write_and_parse(modules, model, tmp_path)
+    
+    for stream, parsed_stream in zip(model['vertex_streams'], parsed['vertex_streams']):
+        assert [definition['type'] for definition in parsed_stream['definition']] == [definition['type'] for definition in stream['definition']]
+        assert len(parsed_stream['attributes']) == len(stream['attributes'])
+        for attribute, parsed_attribute in zip(stream['attributes'], parsed_stream['attributes']):
+            assert np.array_equal(parsed_attribute, attribute)
+    assert len(parsed['vertex_streams']) == len(model['vertex_streams'])
+    
+    assert len(parsed['face_streams']) == len(model['face_streams'])
+    for stream, parsed_stream in zip(model['face_streams'], parsed['face_streams']):
+        assert np.array_equal(parsed_stream['faces'], stream['faces'])
+    
+    elements = parsed['elements']
+    assert elements.column_names() == [element['name'] for element in model['elements']]
+    assert elements.column('parent').tolist() == [element.get('parent', -1) for element in model['elements']]
+    assert np.array_equal(elements.column('matrix'), np.array([writer.matrix_floats(element['matrix']) for element in model['elements']], np.float32))
+    assert np.allclose([element['matrix']['position'] for element in elements], [element['matrix']['position'] for element in model['elements']])
+    
+    meshes = parsed['meshes']
+    for key in ('material_index', 'definition', 'face_type', 'face_stream_index', 'object_index'):
+        assert meshes.column(key).tolist() == [mesh[key] for mesh in model['meshes']]
+    assert [mesh['data1'] for mesh in meshes] == [mesh['data1'] for mesh in model['meshes']]
+    assert meshes.first('data2')['vOffset'].tolist() == [mesh['data2'][0]['vOffset'] for mesh in model['meshes']]
+    
+    assert [bytes(texture['data']) for texture in parsed['textures']] == [bytes(texture['data']) for texture in model['textures']]
+    assert parsed['fx_files'] == model['fx_files']
+
+def test_element_owners(modules, tmp_path):
+    cpmodel, writer, synthetic = modules
+    model = synthetic.generate_model(elements=4, vertex_streams=1, vertices=64, face_streams=1, meshes=1, triangles=8, textures=0)
+    model['models'].append(dict(model['models'][0], name='second', element_count=2))
+    #Copies of the element dicts are placed by their fields
+    model['elements'] = [dict(element, model_index=i // 2, element_index=i % 2) for i, element in enumerate(model['elements'])]
+    
+    elements = write_and_parse(modules, model, tmp_path)['elements']
+    assert elements.column('model_index').tolist() == [0, 0, 1, 1]
+    assert elements.column('element_index').tolist() == [0, 1, 0, 1]
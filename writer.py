@@ -0,0 +1,315 @@
+import os
+import struct
+
+import numpy as np
+
+from .cpmodel import INT, SHORT, vertex_attribute_format, vertex_stream_dtype, CPModelFormatError, RecordTable, SUBMODEL_DTYPE, ELEMENT_DTYPE
+
+#Writes the section layout parse_cpmodel reads, from a model dict of the same shape LazyCPModel.load() returns.
+#Submodels, elements and meshes may be the parser's RecordTables or lists of dicts with the same keys.
+#Fields the parser skips over are written as the marker or value its comments show, or zero where they are unknown.
+
+MARKER = 0x4152             #52410000
+STREAM_MARKER = 0x14152     #52410100, written after a 02 byte so the stream starts with 0x1415202
+
+EMPTY_BOUNDING_BOX = ({'x':0.0, 'z':0.0, 'y':0.0}, {'x':0.0, 'z':0.0, 'y':0.0})
+
+class Writer:
+    #"""Collects the file as a list of byte chunks. Arrays are added as views and joined once when written."""
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+    
+    def pos(self) -> int:
+        return self.size
+    
+    def write(self, data):
+        data = memoryview(data).cast('B')
+        self.chunks.append(data)
+        self.size += data.nbytes
+    
+    def write_ints(self, *values):
+        self.write(struct.pack('<{0}i'.format(len(values)), *values))
+    
+    def write_int(self, value):
+        self.write(INT.pack(value))
+    
+    def write_short(self, value):
+        self.write(SHORT.pack(value))
+    
+    def write_byte(self, value):
+        self.write(bytes((value,)))
+    
+    def write_floats(self, *values):
+        self.write(struct.pack('<{0}f'.format(len(values)), *values))
+    
+    def write_array(self, array):
+        self.write(np.ascontiguousarray(array))
+    
+    def write_string(self, value, length = 0, clip = 0):
+        #"""Write [value] as utf-8, prefixed by its length unless a fixed [length] is given. A fixed length
+        #string is padded with spaces to [length] - [clip] bytes followed by [clip] zero bytes, as the section titles are."""
+        data = value.encode('utf-8')
+        if length == 0:
+            self.write_int(len(data))
+            self.write(data)
+        else:
+            self.write(data[:length - clip].ljust(length - clip, b' ') + b'\0' * clip)
+    
+    def write_cstring(self, value):
+        self.write(value.encode('utf-8') + b'\0')
+    
+    def marker(self, count = 1):
+        self.write_ints(*[MARKER] * count)
+    
+    def pad(self, amount):
+        self.write(bytes(amount))
+    
+    def getvalue(self) -> bytes:
+        return b''.join(self.chunks)
+    
+    def save(self, filepath):
+        #"""Write every chunk to [filepath] in one buffered pass, through a temporary file so readers never see half a model"""
+        temp = filepath + '.tmp'
+        with open(temp, 'wb', buffering=1024 * 1024) as file:
+            file.writelines(self.chunks)
+        os.replace(temp, filepath)
+
+def encode_vertex_stream(attributes, definitions) -> np.ndarray:
+    #"""The inverse of decode_vertex_stream: pack one (count, 4) array per attribute into structured vertex records.
+    #Floats are swizzled back into their stored order, unorm values are scaled to bytes and rounded."""
+    count = len(attributes[0]) if len(attributes) > 0 else 0
+    records = np.zeros(count, vertex_stream_dtype(definitions))
+    for i, definition in enumerate(definitions):
+        data_type = definition['type']
+        component, size, order = vertex_attribute_format(data_type)
+        values = np.asarray(attributes[i])[:, :size]
+        
+        if data_type == 0xB:
+            values = np.rint(np.clip(values, 0.0, 1.0) * 255.0)
+        stored = np.empty((count, size), values.dtype)
+        stored[:, order] = values
+        records['a{0}'.format(i)] = stored
+    return records
+
+def bounding_box_floats(bbox) -> tuple:
+    return tuple(corner[axis] for corner in bbox for axis in ('x', 'z', 'y'))
+
+def matrix_floats(matrix) -> tuple:
+    #"""The 3x3 block and position of a matrix dict as stored. The block comes from 'basis' (9 floats in file order)
+    #when present and is otherwise the diagonal of 'scale'. Position and scale are in Blender's x y z order."""
+    position = matrix['position']
+    if 'basis' in matrix:
+        basis = tuple(matrix['basis'])
+    else:
+        scale = matrix.get('scale', [1.0, 1.0, 1.0])
+        basis = (scale[0], 0.0, 0.0, 0.0, scale[2], 0.0, 0.0, 0.0, scale[1])
+    return basis + (position[0], position[2], position[1])
+
+def record_names(records) -> list:
+    if isinstance(records, RecordTable):
+        return records.column_names()
+    return [record['name'] for record in records]
+
+def model_names(model) -> list:
+    #"""Every submodel and element name once, in the order they are first used"""
+    names = {}
+    for name in record_names(model['models']) + record_names(model['elements']):
+        names.setdefault(name, len(names))
+    return list(names)
+
+def submodel_array(models, name_indices) -> np.ndarray:
+    #"""The submodel records as stored, with their names pointing into the written names"""
+    if isinstance(models, RecordTable):
+        array = models.array.copy()
+    else:
+        array = np.zeros(len(models), SUBMODEL_DTYPE)
+        for i, submodel in enumerate(models):
+            array[i]['matrix'] = matrix_floats(submodel['matrix'])
+            array[i]['bounding_box'] = bounding_box_floats(submodel['bounding_box'])
+            array[i]['model_index'] = submodel.get('model_index', 0)
+            array[i]['element_count'] = submodel.get('element_count', 0)
+            array[i]['hierarchy_index'] = submodel.get('hierarchy_index', 0)
+    array['name_index'] = [name_indices[name] for name in record_names(models)]
+    return array
+
+def element_array(model, name_indices) -> np.ndarray:
+    #"""The element records as stored. Elements given as dicts are placed in their submodel by their 'model_index' and
+    #'element_index', the first submodel at their position in the element list by default."""
+    elements = model['elements']
+    if isinstance(elements, RecordTable):
+        array = elements.array.copy()
+    else:
+        array = np.zeros(len(elements), ELEMENT_DTYPE)
+        for i, element in enumerate(elements):
+            array[i]['model_index'] = element.get('model_index', 0)
+            array[i]['element_index'] = element.get('element_index', i)
+            array[i]['matrix'] = matrix_floats(element['matrix'])
+            array[i]['bounding_box'] = bounding_box_floats(element['bounding_box'])
+            array[i]['parent'] = element.get('parent', -1)
+    array['name_index'] = [name_indices[name] for name in record_names(elements)]
+    return array
+
+def write_sections(writer, model):
+    names = model_names(model)
+    name_indices = {name:i for i, name in enumerate(names)}
+    
+    writer.write_string('..CP', 4)
+    
+    def section(title, clip):
+        writer.write_string(title, 8, clip)
+        writer.write_ints(0, 0)
+    
+    section('Model', 3)
+    section('Header', 2)
+    writer.marker()
+    section('MdlDat', 2)
+    section('Header', 2)
+    writer.marker()
+    
+    writer.write_ints(len(model['models']), len(model['elements']), MARKER)
+    writer.write_floats(*bounding_box_floats(model.get('bounding_box', EMPTY_BOUNDING_BOX)))
+    
+    section('Names', 2)
+    encoded = [name.encode('utf-8') for name in names]
+    offsets = np.cumsum([0] + [len(name) + 1 for name in encoded])
+    writer.write_int(len(names))
+    writer.write_array(offsets.astype('<i4'))
+    writer.write(b''.join(name + b'\0' for name in encoded))
+    
+    section('Models', 2)
+    writer.write_array(submodel_array(model['models'], name_indices))
+    
+    section('Element', 1)
+    writer.write_array(element_array(model, name_indices))
+    
+    section('Constr', 2)
+    section('Render', 2)
+    section('Render', 2)
+    section('Header', 2)
+    writer.marker()
+    section('Scene', 3)
+    
+    writer.write(b'ARCH')
+    writer.write_ints(1, 0)
+    writer.write(b'ARCH')
+    writer.write_ints(0, 1)
+    writer.write_ints(0x14152, MARKER, 2)
+    writer.write_ints(MARKER, 0, MARKER, 0x24152, MARKER, 0)
+    writer.marker()
+    
+    writer.write_int(0) #Arch data
+    
+    writer.write(b'\xff' * 0xc)
+    writer.write_ints(0, MARKER)
+    writer.pad(0x20)
+    writer.write_ints(MARKER, 0)
+    writer.marker()
+    writer.write_int(0) #ff count
+    writer.pad(4)
+    
+    writer.write_ints(MARKER, 0, MARKER, 0, MARKER)
+    
+    writer.write_int(len(model['vert_definitions']))
+    for definitions in model['vert_definitions']:
+        writer.marker()
+        writer.write_int(len(definitions))
+        for definition in definitions:
+            writer.marker()
+            writer.write_short(definition.get('prefix', 0))
+            writer.write_short(definition['offset'])
+            writer.write_ints(definition['type'], MARKER, definition.get('channel', 0))
+            writer.write_byte(definition.get('sub_channel', 0))
+    
+    writer.marker()
+    writer.write_int(len(model['fx_files']))
+    for fx_file in model['fx_files']:
+        writer.marker(2)
+        writer.write_string(fx_file)
+    writer.marker(3)
+    writer.write_int(2)
+    
+    writer.write_int(len(model['textures']))
+    for texture in model['textures']:
+        data = memoryview(texture['data']).cast('B')
+        writer.write_string(texture['name'])
+        writer.write_int(0)
+        writer.write_ints(MARKER, MARKER, 2)
+        writer.write_string(texture.get('name2', texture['name']))
+        writer.marker()
+        writer.pad(11 * 4)
+        writer.write_ints(data.nbytes + 0x1c, texture['height'], texture['width'], 0, texture['mipmaps'], texture['dxt'], 0, 0)
+        writer.write(data)
+    
+    writer.write_ints(MARKER, 0x34152)
+    writer.write_ints(*[MARKER, 0] * 5)
+    writer.write_int(1)
+    writer.marker()
+    writer.write_int(3)
+    writer.write(b'\0\0\x02')
+    writer.marker(2)
+    writer.write_ints(MARKER, 0, 0, 0)
+    writer.write_int(0) #uvsd1
+    writer.marker(2)
+    writer.write_ints(2, 0xA)
+    writer.marker(2)
+    writer.write_ints(2, 0)
+    writer.marker()
+    
+    writer.write_int(len(model['vertex_streams']))
+    for stream in model['vertex_streams']:
+        definitions = stream['definition']
+        records = stream['records'] if 'records' in stream else encode_vertex_stream(stream['attributes'], definitions)
+        dtype = vertex_stream_dtype(definitions)
+        
+        writer.write_byte(2)
+        writer.write_ints(STREAM_MARKER, MARKER, dtype.itemsize, MARKER, len(definitions))
+        for definition in definitions:
+            writer.write_ints(MARKER, definition['type'], definition.get('unknown', 0), definition.get('channel', 0), definition.get('sub_channel', 0))
+        writer.marker()
+        writer.write_int(len(definitions))
+        writer.write_array(np.array([dtype.fields['a{0}'.format(i)][1] for i in range(len(definitions))], '<i2'))
+        writer.write_ints(len(records), MARKER, records.nbytes, MARKER)
+        writer.write_array(records)
+    writer.marker()
+    
+    writer.write_int(len(model['face_streams']))
+    for stream in model['face_streams']:
+        faces = np.asarray(stream['faces'])
+        if len(faces) > 0 and faces.max() > 0xFFFF:
+            raise CPModelFormatError('Face stream indices must fit in 16 bits, found index {0}'.format(int(faces.max())))
+        faces = faces.astype('<u2')
+        writer.write_byte(2)
+        writer.write_ints(STREAM_MARKER, len(faces), 0, MARKER, faces.nbytes, 0x10)
+        writer.write_array(faces)
+    writer.marker()
+    
+    writer.write_int(0) #Rendering data
+    writer.write_ints(MARKER, 0, MARKER, 0, MARKER, MARKER)
+    
+    writer.write_int(0) #Shaders
+    writer.marker(3)
+    
+    writer.write_int(len(model['meshes']))
+    for mesh in model['meshes']:
+        writer.marker()
+        writer.write_ints(mesh['material_index'], mesh['definition'], mesh['face_type'], mesh['face_stream_index'])
+        writer.write_short(mesh['object_index'])
+        writer.write_short(0)
+        writer.write_ints(MARKER, 0, 0, MARKER, 0, 0)
+        writer.write_ints(MARKER, 1, 5, 0, 0, 1, 0, MARKER)
+        
+        writer.write_int(len(mesh['data1']))
+        for data in mesh['data1']:
+            writer.write_ints(MARKER, data['face_offset'], data['face_count'], data['vert_offset'], data['vert_count'])
+        writer.marker()
+        writer.write_int(len(mesh['data2']))
+        for data in mesh['data2']:
+            writer.write_ints(MARKER, data.get('u1', 0), data.get('u2', 0), data['vOffset'], data.get('u4', 0), MARKER, data.get('u5', 0), data.get('u6', 0))
+    writer.marker()
+
+def write_cpmodel(filepath, model):
+    #"""Write [model] to [filepath]. Vertex streams are packed from their 'attributes', or written as is from 'records'."""
+    writer = Writer()
+    write_sections(writer, model)
+    writer.save(filepath)